@@ -0,0 +1,122 @@
+import os
+import sys
+import glob
+import json
+import time
+import base64
+from io import StringIO
+
+import gmail_check
+
+# ✅ Medium 알림 메일 본문 링크 추출 벤치마크
+#   python bench_email_extract.py <corpus 디렉터리> [--repeat N]
+#   python bench_email_extract.py <corpus 디렉터리> --fetch [--query Q]   # Gmail 에서 corpus 저장
+#
+# corpus 는 Gmail API messages().get 결과를 메일 하나당 JSON 파일(*.json)로 저장한 것입니다.
+# 기존 방식(최상위 파트만 확인, StringIO + etree.parse, 매번 XPath 문자열 평가)과
+# 현재 방식(find_html_part + 컴파일된 XPath)의 처리 시간을 비교합니다.
+
+DEFAULT_QUERY = "from:noreply@medium.com"
+
+
+def legacy_extract(payload):
+  """ 이전 check_emails 의 본문 링크 추출 방식 """
+  from lxml import etree
+
+  html_body = None
+  if payload.get("body") and "data" in payload["body"]:
+    html_body = base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8")
+  elif "parts" in payload:
+    for part in payload["parts"]:
+      if part["mimeType"] == "text/html" and "data" in part["body"]:
+        html_body = base64.urlsafe_b64decode(part["body"]["data"]).decode("utf-8")
+        break
+  if not html_body:
+    return []
+
+  tree = etree.parse(StringIO(html_body), etree.HTMLParser())
+  return tree.xpath(gmail_check.DOWNLOAD_LINK_XPATH)
+
+
+def current_extract(payload):
+  html_body = gmail_check.get_html_body(payload)
+  if not html_body:
+    return []
+  return gmail_check.extract_download_links(html_body)
+
+
+def load_corpus(corpus_dir):
+  payloads = []
+  for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+    with open(path, "r", encoding="utf-8") as f:
+      payloads.append(json.load(f)["payload"])
+  return payloads
+
+
+def fetch_corpus(corpus_dir, query=DEFAULT_QUERY, limit=200):
+  """ Gmail 에서 조건에 맞는 메일을 corpus 디렉터리에 저장합니다. """
+  from googleapiclient.discovery import build
+
+  os.makedirs(corpus_dir, exist_ok=True)
+  service = build("gmail", "v1", credentials=gmail_check.authenticate_gmail())
+  messages = service.users().messages().list(userId="me", q=query, maxResults=limit).execute().get("messages", [])
+  for message in messages:
+    msg = service.users().messages().get(userId="me", id=message["id"]).execute()
+    with open(os.path.join(corpus_dir, f"{message['id']}.json"), "w", encoding="utf-8") as f:
+      json.dump(msg, f, ensure_ascii=False)
+  print(f"✅ {len(messages)}개의 메일을 {corpus_dir} 에 저장했습니다.")
+
+
+def measure(extract, payloads, repeat):
+  """ corpus 전체를 repeat 번 처리해 가장 빠른 1회 시간(초)과 추출 결과를 반환합니다. """
+  best = None
+  results = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    results = [extract(payload) for payload in payloads]
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best, results
+
+
+def main(argv):
+  if not argv:
+    print("usage: python bench_email_extract.py <corpus 디렉터리> [--repeat N] [--fetch [--query Q]]")
+    return 1
+
+  corpus_dir = argv[0]
+  options = argv[1:]
+
+  if "--fetch" in options:
+    query = options[options.index("--query") + 1] if "--query" in options else DEFAULT_QUERY
+    fetch_corpus(corpus_dir, query)
+    return 0
+
+  repeat = int(options[options.index("--repeat") + 1]) if "--repeat" in options else 20
+
+  payloads = load_corpus(corpus_dir)
+  if not payloads:
+    print(f"⚠️ {corpus_dir} 에 메일(*.json)이 없습니다.")
+    return 1
+
+  legacy_time, legacy_links = measure(legacy_extract, payloads, repeat)
+  current_time, current_links = measure(current_extract, payloads, repeat)
+
+  count = len(payloads)
+  print(f"📬 {count} messages, best of {repeat}")
+  for name, elapsed in (("legacy", legacy_time), ("current", current_time)):
+    print(f"  {name:<7}: {elapsed * 1000:8.2f} ms ({elapsed / count * 1e6:8.1f} µs/msg, {legacy_time / elapsed:.2f}x)")
+
+  # 기존 방식이 찾은 링크는 현재 방식도 찾아야 함 (현재 방식은 중첩 파트도 탐색)
+  mismatched = 0
+  for old, new in zip(legacy_links, current_links):
+    if old and list(old) != list(new):
+      mismatched += 1
+  if mismatched:
+    print(f"❌ {mismatched}개의 메일에서 추출 결과가 다릅니다.")
+    return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+import os
+import sys
+import subprocess
+
+# ✅ 명령별 시작(import) 시간 벤치마크
+#   python bench_startup.py [명령 ...] [--repeat N]
+#
+# 각 명령마다 새 인터프리터에서 `python -X importtime` 으로 cli 와 명령이 사용하는 모듈을 불러오고,
+# 최상위 import 의 누적 시간을 합산해 목표치와 비교합니다.
+
+# 명령별 목표 시작 시간(ms)
+TARGETS_MS = {
+  "diff": 80,
+  "fetch": 80,
+  "sync": 80,
+  "purge": 80,
+  "multi-sync": 80,
+  "enqueue": 80,
+  "worker": 80,
+  "queue-status": 80,
+  "gmail-watch": 80,
+  "youtube-playlists": 80,
+}
+
+# 명령을 불러오는 것만으로 import 되면 안 되는 모듈 (실제 작업 시점에만 필요)
+FORBIDDEN_MODULES = ("requests", "lxml", "googleapiclient", "google", "google_auth_oauthlib", "dotenv")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(command):
+  """
+  새 프로세스에서 명령의 import 를 수행하고 (총 시간(ms), import 된 최상위 패키지 집합)을 반환합니다.
+  """
+  code = f"import cli; cli.load_command({command!r})"
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", code],
+    cwd=ROOT,
+    capture_output=True,
+    text=True,
+    check=True,
+  )
+
+  total_us = 0
+  packages = set()
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "cumulative" in line:
+      continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    name = name[1:]  # "| " 구분자 뒤의 공백 제거, 남은 들여쓰기는 중첩 깊이
+    packages.add(name.strip().split(".")[0])
+    # 들여쓰기가 없는 항목이 최상위 import (누적 시간에 하위 import 포함)
+    if not name.startswith(" "):
+      total_us += int(cumulative)
+  return total_us / 1000, packages
+
+
+def main(argv):
+  repeat = 5
+  if "--repeat" in argv:
+    index = argv.index("--repeat")
+    repeat = int(argv[index + 1])
+    del argv[index:index + 2]
+  commands = argv or list(TARGETS_MS)
+
+  failed = False
+  for command in commands:
+    # 첫 실행은 .pyc 생성 비용이 섞이므로 최솟값을 사용
+    runs = [measure(command) for _ in range(repeat)]
+    best_ms = min(ms for ms, _ in runs)
+    forbidden = sorted(set(FORBIDDEN_MODULES) & runs[0][1])
+    target = TARGETS_MS.get(command)
+
+    ok = not forbidden and (target is None or best_ms <= target)
+    failed |= not ok
+    status = "✅" if ok else "❌"
+    print(f"{status} {command:<18} {best_ms:7.1f} ms (target {target} ms)" + (f" forbidden imports: {', '.join(forbidden)}" if forbidden else ""))
+
+  return 1 if failed else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
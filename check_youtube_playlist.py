@@ -1,14 +1,14 @@
 import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 
 # OAuth 2.0 인증 범위
 SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 
 def authenticate_youtube():
   """OAuth 2.0을 통해 YouTube API 인증."""
+  from google.auth.transport.requests import Request
+  from google.oauth2.credentials import Credentials
+  from google_auth_oauthlib.flow import InstalledAppFlow
+
   creds = None
   # 기존 인증 토큰 파일 확인
   if os.path.exists('token.json'):
@@ -69,6 +69,8 @@ def get_all_playlists(youtube):
   return playlists
 
 def main():
+  from googleapiclient.discovery import build
+
   creds = authenticate_youtube()
   youtube = build('youtube', 'v3', credentials=creds)
 
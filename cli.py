@@ -0,0 +1,212 @@
+import sys
+import argparse
+import importlib
+import logging
+
+from log_config import setup_logging
+from profiling import configure_profiling
+
+# 무거운 의존성(requests, lxml, google api client)은 각 명령 안에서만 불러옵니다.
+# 명령 이름 → (명령이 사용하는 모듈, 로그 파일)
+COMMANDS = {
+  "sync": (("notion_api",), "notion_sync.log"),
+  "fetch": (("notion_api", "jsonl_store"), "notion_sync.log"),
+  "diff": (("notion_api", "jsonl_store"), "notion_sync.log"),
+  "purge": (("notion_api",), "notion_sync.log"),
+  "multi-sync": (("tenants",), "notion_sync.log"),
+  "enqueue": (("notion_api", "work_queue"), "notion_sync.log"),
+  "worker": (("work_queue",), "notion_worker.log"),
+  "queue-status": (("work_queue",), "notion_sync.log"),
+  "gmail-watch": (("gmail_check",), "gmail_checker.log"),
+  "youtube-playlists": (("check_youtube_playlist",), "youtube_playlist.log"),
+}
+
+logger = logging.getLogger("cli")
+
+
+def load_command(name):
+  """
+  명령이 사용하는 모듈을 불러와 반환합니다. (bench_startup.py 에서 import 비용 측정에도 사용)
+  """
+  modules, _ = COMMANDS[name]
+  return [importlib.import_module(module) for module in modules]
+
+
+def cmd_sync(args):
+  notion_api, = load_command("sync")
+  notion_api.sync(args.bookmarks)
+
+
+def cmd_fetch(args):
+  notion_api, jsonl_store = load_command("fetch")
+  old_list = notion_api.fetch_notion_database()
+  count = jsonl_store.write_jsonl(old_list, args.output)
+  logger.info(f"✅ Saved {count} items to {args.output}")
+
+
+def cmd_diff(args):
+  notion_api, jsonl_store = load_command("diff")
+  # global_diff_update 는 두 목록을 한 번씩만 순회하므로 파일을 한 줄씩 읽어 바로 넘김
+  added, removed, unchanged = notion_api.global_diff_update(
+    jsonl_store.iter_records(args.old), jsonl_store.iter_records(args.new)
+  )
+
+  if args.added:
+    jsonl_store.write_jsonl(added, args.added)
+  if args.removed:
+    jsonl_store.write_jsonl(removed, args.removed)
+
+
+def cmd_purge(args):
+  if not args.yes:
+    logger.error("❌ purge 는 데이터베이스의 모든 항목을 보관 처리합니다. 계속하려면 --yes 를 지정하세요.")
+    return 1
+  notion_api, = load_command("purge")
+  notion_api.delete_all_notion_items()
+
+
+def cmd_multi_sync(args):
+  tenants, = load_command("multi-sync")
+  results = tenants.run_tenants(tenants.load_tenants(args.config), args.workers)
+  return 0 if all(results.values()) else 1
+
+
+def cmd_enqueue(args):
+  notion_api, work_queue = load_command("enqueue")
+  old_list = notion_api.fetch_notion_database()
+  new_list = notion_api.process_multiple_html_files(args.bookmarks)
+  added, removed, unchanged = notion_api.global_diff_update(old_list, new_list)
+
+  backend = work_queue.open_queue(args.queue)
+  try:
+    work_queue.enqueue_diff(backend, added, removed, notion_api.get_config()["database_id"])
+  finally:
+    backend.close()
+
+
+def cmd_worker(args):
+  import os
+  from dotenv import load_dotenv
+
+  work_queue, = load_command("worker")
+  load_dotenv()
+  key_envs = args.key_env or ["NOTION_KEY"]
+  notion_keys = []
+  for key_env in key_envs:
+    if not os.environ.get(key_env):
+      logger.error(f"❌ 환경 변수 {key_env} 에 통합 토큰이 없습니다.")
+      return 1
+    notion_keys.append(os.environ[key_env])
+
+  # 토큰마다 프로세스가 적어도 하나씩 있어야 함 (기본값: 토큰마다 프로세스 하나)
+  processes = max(args.processes or 0, len(notion_keys))
+  if args.processes and args.processes < processes:
+    logger.warning(f"⚠️ 통합 토큰이 {len(notion_keys)}개라 워커 프로세스를 {processes}개로 늘립니다.")
+  options = {"batch_size": args.batch_size, "exit_when_empty": not args.follow}
+  if processes > 1:
+    ok = work_queue.start_workers(
+      args.queue, notion_keys, processes, COMMANDS["worker"][1], **options
+    )
+    return 0 if ok else 1
+
+  backend = work_queue.open_queue(args.queue)
+  try:
+    work_queue.run_worker(backend, notion_keys[0], **options)
+  finally:
+    backend.close()
+
+
+def cmd_queue_status(args):
+  import time
+
+  work_queue, = load_command("queue-status")
+  backend = work_queue.open_queue(args.queue)
+  try:
+    while True:
+      print(work_queue.format_stats(backend.stats(args.window)))
+      if not args.watch:
+        break
+      time.sleep(args.watch)
+  finally:
+    backend.close()
+
+
+def cmd_gmail_watch(args):
+  gmail_check, = load_command("gmail-watch")
+  gmail_check.main()
+
+
+def cmd_youtube_playlists(args):
+  check_youtube_playlist, = load_command("youtube-playlists")
+  check_youtube_playlist.main()
+
+
+def build_parser():
+  parser = argparse.ArgumentParser(prog="cli.py", description="Notion 북마크 동기화 도구")
+  parser.add_argument("--profile", action="store_true", help="단계별 프로파일링 활성화 (logs/ 에 결과 저장)")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  sub = subparsers.add_parser("sync", help="북마크 HTML 을 기준으로 Notion 데이터베이스 동기화")
+  sub.add_argument("--bookmarks", default="./bookmarks", help="북마크 HTML 디렉터리")
+  sub.set_defaults(func=cmd_sync)
+
+  sub = subparsers.add_parser("fetch", help="Notion 데이터베이스 항목을 JSON Lines 로 저장")
+  sub.add_argument("--output", default="notion_links.jsonl", help="저장할 파일 경로")
+  sub.set_defaults(func=cmd_fetch)
+
+  sub = subparsers.add_parser("diff", help="두 스냅샷(JSON Lines/JSON)을 URL 기준으로 비교")
+  sub.add_argument("old", help="기존 스냅샷 경로")
+  sub.add_argument("new", help="새 스냅샷 경로")
+  sub.add_argument("--added", help="추가된 항목을 저장할 경로")
+  sub.add_argument("--removed", help="삭제된 항목을 저장할 경로")
+  sub.set_defaults(func=cmd_diff)
+
+  sub = subparsers.add_parser("purge", help="Notion 데이터베이스의 모든 항목 보관 처리")
+  sub.add_argument("--yes", action="store_true", help="확인 없이 실행")
+  sub.set_defaults(func=cmd_purge)
+
+  sub = subparsers.add_parser("multi-sync", help="설정 파일의 여러 테넌트 작업을 한 프로세스에서 동시에 실행")
+  sub.add_argument("--config", default="tenants.json", help="테넌트 설정 파일 (tenants.example.json 참고)")
+  sub.add_argument("--workers", type=int, help="동시에 실행할 동기화 작업 수 (기본값: 전체 동기화 작업 수, Gmail 확인 작업은 별도 스레드)")
+  sub.set_defaults(func=cmd_multi_sync)
+
+  sub = subparsers.add_parser("enqueue", help="비교 결과(add/archive)를 작업 큐에 넣기")
+  sub.add_argument("--bookmarks", default="./bookmarks", help="북마크 HTML 디렉터리")
+  sub.add_argument("--queue", default="sqlite:work_queue.db", help="큐 주소 (백엔드:위치)")
+  sub.set_defaults(func=cmd_enqueue)
+
+  sub = subparsers.add_parser("worker", help="작업 큐의 Notion 쓰기 작업 처리")
+  sub.add_argument("--queue", default="sqlite:work_queue.db", help="큐 주소 (백엔드:위치)")
+  sub.add_argument("--key-env", action="append", help="워커가 사용할 통합 토큰의 환경 변수 이름 (여러 번 지정 가능, 기본값: NOTION_KEY)")
+  sub.add_argument("--processes", type=int, help="워커 프로세스 수 (기본값·최솟값: 토큰 수). 토큰을 나눠 쓰는 프로세스는 rate limit 도 나눠 가짐")
+  sub.add_argument("--batch-size", type=int, default=10, help="한 번에 임대할 작업 수")
+  sub.add_argument("--follow", action="store_true", help="큐가 비어도 종료하지 않고 계속 대기")
+  sub.set_defaults(func=cmd_worker)
+
+  sub = subparsers.add_parser("queue-status", help="작업 큐 진행 상황과 워커별 처리량 출력")
+  sub.add_argument("--queue", default="sqlite:work_queue.db", help="큐 주소 (백엔드:위치)")
+  sub.add_argument("--window", type=int, default=60, help="처리량 계산 구간(초)")
+  sub.add_argument("--watch", type=int, default=0, help="N 초마다 반복 출력")
+  sub.set_defaults(func=cmd_queue_status)
+
+  sub = subparsers.add_parser("gmail-watch", help="Medium 다운로드 메일이 올 때까지 Gmail 확인")
+  sub.set_defaults(func=cmd_gmail_watch)
+
+  sub = subparsers.add_parser("youtube-playlists", help="YouTube 재생목록 조회")
+  sub.set_defaults(func=cmd_youtube_playlists)
+
+  return parser
+
+
+def main(argv=None):
+  args = build_parser().parse_args(argv)
+
+  setup_logging(COMMANDS[args.command][1])
+  if args.profile:
+    configure_profiling(enabled=True)
+
+  return args.func(args) or 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -3,7 +3,7 @@ import glob
 from lxml import etree
 import multiprocessing
 from itertools import islice
-import json
+from jsonl_store import iter_records, write_jsonl
 
 # 리스트를 hashmap 으로 변환
 def list_to_map(data_list):
@@ -13,6 +13,7 @@ def list_to_map(data_list):
 def global_diff_update(old_list, new_list):
   """
   old_list와 new_list를 글로벌 HashMap을 사용하여 비교합니다.
+  old_list 는 한 번만 순회하므로 iter_old_list 의 이터레이터를 그대로 넘길 수 있습니다.
   """
   old_map = list_to_map(old_list)
   new_map = list_to_map(new_list)
@@ -113,39 +114,53 @@ def process_multiple_html_files(directory, file_pattern='bookmarks-*.html'):
   
   return all_links
 
-# ✅ JSON 파일에서 기존 리스트(old_list) 불러오기
-def load_old_list(json_file='output_links.json'):
+# .jsonl 파일이 없으면 이전 형식의 JSON 배열 파일(output_links.json 등) 경로를 반환
+def _old_list_path(json_file):
+  if not os.path.exists(json_file) and json_file.endswith('.jsonl'):
+    legacy_file = json_file[:-len('.jsonl')] + '.json'
+    if os.path.exists(legacy_file):
+      print(f"⚠️ {json_file} not found. Falling back to legacy {legacy_file}")
+      return legacy_file
+  return json_file
+
+# ✅ JSON Lines 파일을 한 줄씩 순회
+def iter_old_list(json_file='output_links.jsonl'):
   """
-  기존 JSON 파일을 불러와 old_list로 반환합니다.
+  기존 리스트 전체를 메모리에 올리지 않고 항목을 하나씩 반환합니다.
+  .jsonl 파일이 없으면 이전 형식의 JSON 배열 파일(output_links.json 등)을 대신 읽습니다.
   """
-  if os.path.exists(json_file):
-    with open(json_file, 'r', encoding='utf-8') as file:
-      old_list = json.load(file)
-      print(f"✅ Loaded {len(old_list)} items from {json_file}")
-      return old_list
-  else:
+  json_file = _old_list_path(json_file)
+  if not os.path.exists(json_file):
     print(f"⚠️ No existing JSON file found at {json_file}. Returning an empty list.")
-    return []
+    return iter(())
+  return iter_records(json_file)
+
+# ✅ JSON 파일에서 기존 리스트(old_list) 불러오기
+def load_old_list(json_file='output_links.jsonl'):
+  """
+  기존 JSON Lines 파일을 불러와 old_list로 반환합니다. (순회만 하면 iter_old_list)
+  """
+  old_list = list(iter_old_list(json_file))
+  print(f"✅ Loaded {len(old_list)} items from {json_file}")
+  return old_list
 
 # ✅ 결과를 JSON으로 저장
-def save_to_json(data, output_file='output_links.json'):
+def save_to_json(data, output_file='output_links.jsonl'):
   """
-  추출된 URL, 제목, 시간을 JSON 파일로 저장합니다.
+  추출된 URL, 제목, 시간을 JSON Lines 파일로 저장합니다.
+  data는 리스트뿐 아니라 제너레이터도 가능하며, ".gz"/".zst" 확장자면 압축합니다.
   """
-  with open(output_file, 'w', encoding='utf-8') as jsonfile:
-    json.dump(data, jsonfile, indent=4, ensure_ascii=False)
+  count = write_jsonl(data, output_file)
   
-  print(f"✅ Data saved to {output_file}")
+  print(f"✅ Data saved to {output_file} ({count} items)")
 
 # ✅ 메인 실행
 if __name__ == '__main__':
   # HTML 파일들이 저장된 디렉터리 경로 설정
   input_directory = './bookmarks'  # 현재 디렉터리
   
-  old_links = load_old_list()
-  
   # 기존 리스트 결과 출력 (일부만 확인)
-  for link in old_links[:5]:
+  for link in islice(iter_old_list(), 5):
     print(link)
   
   # 여러 HTML 파일 처리
@@ -155,8 +170,9 @@ if __name__ == '__main__':
   for link in new_links[:5]:
     print(link)
   
-  # updated_list, removed_items = multiprocessing_global_diff(old_links, new_links)
-  updated_list, removed_items = global_diff_update(old_links, new_links)
+  # updated_list, removed_items = multiprocessing_global_diff(load_old_list(), new_links)
+  # old_map 을 만들 때 기존 리스트를 한 줄씩 읽음
+  updated_list, removed_items = global_diff_update(iter_old_list(), new_links)
 
   print(len(updated_list))
   print(len(removed_items))
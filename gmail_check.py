@@ -2,54 +2,211 @@ import os
 import base64
 import time
 import logging
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from lxml import etree
-from io import StringIO
-import requests
+import threading
+from log_config import setup_logging
+from profiling import enable_profiling_from_argv, profile_stage
 
-# log settings
-LOG_DIR = "logs"
-LOG_FILE = os.path.join(LOG_DIR, "gmail_checker.log")
-
-# check log directory
-os.makedirs(LOG_DIR, exist_ok=True)
+# google api client, lxml, requests 는 import 비용이 커서 사용하는 함수 안에서 불러옵니다.
 
-logging.basicConfig(
-  level=logging.INFO,
-  format="%(asctime)s - %(level)s - %(message)s",
-  handlers=[logging.FileHandler(LOG_FILE), logging.StreamHandler()],
-)
+# log settings
+LOG_FILE = "gmail_checker.log"
 
 # gmail api scope
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
-def authenticate_gmail():
-  """ Gmail API 인증 """
+# 첨부파일 base64 디코딩 청크 크기 (4의 배수여야 함)
+ATTACHMENT_CHUNK_SIZE = 4 * 256 * 1024
+
+# Medium 다운로드 메일의 버튼 링크 XPath
+DOWNLOAD_LINK_XPATH = "//a[contains(@class, 'email-button') or contains(text(), 'Download my archive')]/@href"
+
+# 처리한 메일 ID 기록 파일 (download_path 아래)
+PROCESSED_IDS_FILE = "processed_message_ids.txt"
+
+# 컴파일된 XPath 는 스레드 간에 공유하지 않음
+_xpath_local = threading.local()
+
+def authenticate_gmail(credentials_path="credentials.json", token_path="token.json", interactive=True):
+  """
+  Gmail API 인증 (계정마다 token_path 를 다르게 지정)
+
+  interactive=False 면 브라우저 OAuth 흐름을 시작하지 않고, 유효한 토큰이 없을 때 RuntimeError 를 냅니다.
+  (백그라운드 스레드에서 실행하는 multi-sync 용)
+  """
+  from google.oauth2.credentials import Credentials
+  from google_auth_oauthlib.flow import InstalledAppFlow
+  from google.auth.transport.requests import Request
+
+  def run_flow():
+    if not interactive:
+      raise RuntimeError(f"{token_path} 에 유효한 Gmail 토큰이 없습니다. gmail-watch 로 먼저 인증하세요.")
+    flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+    return flow.run_local_server(port=0)
+
   creds = None
-  credentials_path = "credentials.json"
-  token_path = "token.json"
   if os.path.exists(token_path):
     creds = Credentials.from_authorized_user_file(token_path, SCOPES)
   if not creds or not creds.valid:
     if creds and creds.expired and creds.refresh_token:
       try:
         creds.refresh(Request())
-      except:
-        flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-        creds = flow.run_local_server(port=0)
+      except Exception:
+        creds = run_flow()
     else:
-      flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-      creds = flow.run_local_server(port=0)
+      creds = run_flow()
     with open(token_path, "w") as token:
         token.write(creds.to_json())
   return creds
 
+def iter_mime_parts(payload):
+  """
+  메시지 payload의 MIME 파트를 중첩 깊이와 상관없이 순회합니다. (본문은 디코딩하지 않음)
+
+  Args:
+      payload: Gmail API 메시지의 payload(dict).
+
+  Yields:
+      dict: 각 MIME 파트 (payload 자신 포함).
+  """
+  stack = [payload]
+  while stack:
+    part = stack.pop()
+    yield part
+    # 원래 순서대로 방문하도록 역순으로 push
+    stack.extend(reversed(part.get("parts", [])))
+
+def find_html_part(payload):
+  """
+  중첩 깊이와 상관없이 데이터가 있는 첫 번째 text/html 파트를 찾습니다. 다른 파트는 디코딩하지 않습니다.
+
+  Args:
+      payload: Gmail API 메시지의 payload(dict).
+
+  Returns:
+      dict: text/html 파트 (없으면 None).
+  """
+  for part in iter_mime_parts(payload):
+    if part.get("mimeType") == "text/html" and part.get("body", {}).get("data"):
+      return part
+  return None
+
+def get_html_body(payload):
+  """
+  메시지의 HTML 본문을 디코딩해 반환합니다. (없으면 None)
+  """
+  part = find_html_part(payload)
+  if part is None:
+    return None
+  data = part["body"]["data"]
+  data += "=" * (-len(data) % 4)  # 패딩이 생략된 경우 보정
+  return base64.urlsafe_b64decode(data).decode("utf-8", errors="replace")
+
+def extract_download_links(html_body):
+  """
+  HTML 본문에서 다운로드 버튼의 href 를 추출합니다.
+  XPath 는 스레드마다 한 번만 컴파일해 재사용합니다.
+
+  Args:
+      html_body (str): HTML 문자열.
+
+  Returns:
+      list: href 문자열 목록.
+  """
+  from lxml import etree
+
+  xpath = getattr(_xpath_local, "download_links", None)
+  if xpath is None:
+    xpath = _xpath_local.download_links = etree.XPath(DOWNLOAD_LINK_XPATH, smart_strings=False)
+
+  tree = etree.HTML(html_body)
+  if tree is None:
+    return []
+  return xpath(tree)
+
+def load_processed_ids(path):
+  """ 처리한 메일 ID 목록을 파일에서 읽어 set 으로 반환합니다. """
+  if not os.path.exists(path):
+    return set()
+  with open(path, "r", encoding="utf-8") as f:
+    return {line.strip() for line in f if line.strip()}
+
+def save_processed_id(path, msg_id):
+  """ 처리한 메일 ID 를 파일에 추가합니다. """
+  with open(path, "a", encoding="utf-8") as f:
+    f.write(msg_id + "\n")
+
+def write_base64_to_file(data, file_path, chunk_size=ATTACHMENT_CHUNK_SIZE):
+  """
+  URL-safe base64 문자열을 청크 단위로 디코딩해 임시 파일에 쓰고, 완료되면 원자적으로 이름을 바꿉니다.
+
+  Args:
+      data (str): URL-safe base64 문자열.
+      file_path (str): 최종 저장 경로.
+      chunk_size (int): 한 번에 디코딩할 문자 수 (4의 배수).
+
+  Returns:
+      int: 기록된 바이트 수.
+  """
+  tmp_path = f"{file_path}.part"
+  written = 0
+  try:
+    with open(tmp_path, "wb") as f:
+      for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        if len(chunk) % 4:
+          chunk += "=" * (-len(chunk) % 4)  # 패딩이 생략된 마지막 청크 보정
+        written += f.write(base64.urlsafe_b64decode(chunk))
+    os.replace(tmp_path, file_path)
+  except BaseException:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+  return written
+
+def download_attachments(service, msg_id, payload, download_path, limit=None):
+  """
+  메시지의 모든 중첩 파트에서 첨부파일을 찾아 스트리밍 방식으로 저장합니다.
+  파일명이 없는 파트는 가져오지 않으며, limit 개수를 채우면 나머지 파트는 요청하지 않습니다.
+
+  Args:
+      service: Gmail API 서비스 객체.
+      msg_id: 메일 ID.
+      payload: 메시지 payload(dict).
+      download_path: 첨부파일 저장 경로.
+      limit: 저장할 최대 첨부파일 수 (기본값: 제한 없음).
+
+  Returns:
+      list: 저장된 파일 경로 목록.
+  """
+  saved = []
+  for part in iter_mime_parts(payload):
+    if limit is not None and len(saved) >= limit:
+      break
+    filename = os.path.basename(part.get("filename") or "")
+    if not filename:
+      continue
+
+    body = part.get("body", {})
+    data = body.get("data")
+    if data is None:
+      attachment_id = body.get("attachmentId")
+      if not attachment_id:
+        continue
+      data = service.users().messages().attachments().get(
+          userId="me", messageId=msg_id, id=attachment_id, fields="data"
+      ).execute()["data"]
+
+    file_path = os.path.join(download_path, filename)
+    size = write_base64_to_file(data, file_path)
+    del data
+    logging.info(f"🔗 첨부파일 저장됨: {file_path} ({size} bytes)")
+    saved.append(file_path)
+  return saved
+
 def check_emails2(service, sender_email, download_path):
     """ 특정 발신자의 이메일 확인 및 첨부파일 다운로드. """
+    from googleapiclient.errors import HttpError
+
     try:
       logging.info("메일 확인 중...")
       results = service.users().messages().list(userId="me", q=f"from:{sender_email}").execute()
@@ -68,26 +225,15 @@ def check_emails2(service, sender_email, download_path):
         #   if header["name"] == "Subject":
         #     logging.info(f"제목: {header['value']}")
 
-        if "parts" in payload["body"]:
-          for part in payload["body"]["parts"]:
-            if part["filename"]:
-              attachment_id = part["body"]["attachmentId"]
-              attachment = service.users().messages().attachments().get(userId="me", messageId=message["id"], id=attachment_id).execute()
-              data = base64.urlsafe_b64decode(
-                  attachment["data"].encode("UTF-8")
-              )
-              file_path = os.path.join(download_path, part["filename"])
-              with open(file_path, "wb") as f:
-                f.write(data)
-                logging.info(f"첨부파일 저장됨: {file_path}")
-
-              return True
+        if download_attachments(service, message["id"], payload, download_path, limit=1):
+          return True
     except HttpError as error:
       logging.error(f"An error occurred: {error}")
 
     return False
 
-def check_emails(service, sender_email, download_path, mode="attachment", search_query=""):
+@profile_stage("check_emails")
+def check_emails(service, sender_email, download_path, mode="attachment", search_query="", processed_ids=None, skipped_ids=None):
   """
   특정 발신자의 이메일을 확인하고 요청에 따라 첨부파일 다운로드 또는 HTML 본문 분석을 수행.
   
@@ -95,11 +241,17 @@ def check_emails(service, sender_email, download_path, mode="attachment", search
       service: Gmail API 서비스 객체.
       sender_email: 확인할 발신자 이메일 주소.
       download_path: 첨부파일 저장 경로.
-      mode: 작업 모드 ("attachment" 또는 "html").
+      mode: 작업 모드 ("attachment" 또는 "body").
+      search_query: 추가 검색 조건.
+      processed_ids: 이미 처리한 메일 ID set. 지정하면 해당 메일은 건너뛰고, 처리한 ID 를 추가합니다.
+      skipped_ids: 본문/링크를 찾지 못한 메일 ID set. 지정하면 해당 메일은 건너뛰고, 실패한 ID 를 추가합니다.
+          (processed_ids 와 달리 저장하지 않으므로 다음 실행에서 다시 확인)
   
   Returns:
       bool: 작업 성공 여부.
   """
+  from googleapiclient.errors import HttpError
+
   try:
     logging.info("📩 메일 확인 중...")
 
@@ -111,6 +263,10 @@ def check_emails(service, sender_email, download_path, mode="attachment", search
     results = service.users().messages().list(userId="me", q=query).execute()
     messages = results.get("messages", [])
 
+    seen_ids = (processed_ids or set()) | (skipped_ids or set())
+    if seen_ids:
+      messages = [message for message in messages if message["id"] not in seen_ids]
+
     if not messages:
       logging.info("✅ 조건에 맞는 이메일이 없습니다.")
       return False
@@ -127,49 +283,30 @@ def check_emails(service, sender_email, download_path, mode="attachment", search
 
       if mode == "attachment":
         # 첨부파일 다운로드
-        if "parts" in payload["body"]:
-          for part in payload["body"]["parts"]:
-            if part["filename"]:
-              attachment_id = part["body"]["attachmentId"]
-              attachment = service.users().messages().attachments().get(
-                  userId="me", messageId=message["id"], id=attachment_id
-              ).execute()
-              data = base64.urlsafe_b64decode(
-                attachment["data"].encode("UTF-8")
-              )
-              file_path = os.path.join(download_path, part["filename"])
-              with open(file_path, "wb") as f:
-                f.write(data)
-                logging.info(f"🔗 첨부파일 저장됨: {file_path}")
-
-              return True
+        if download_attachments(service, msg_id, payload, download_path, limit=1):
+          if processed_ids is not None:
+            processed_ids.add(msg_id)
+          return True
+        if skipped_ids is not None:
+          skipped_ids.add(msg_id)
       elif mode == "body":
-        # 이메일 본문 다운로드
-        html_body = None
-        # HTML 본문 분석
-        if payload.get("body") and "data" in payload["body"]:
-          html_body = base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8")
-        elif "parts" in payload:
-          for part in payload["parts"]:
-            if part["mimeType"] == "text/html" and "data" in part["body"]:
-              html_body = base64.urlsafe_b64decode(part["body"]["data"]).decode("utf-8")
-              break
+        # HTML 본문 분석 (중첩된 파트까지 탐색, text/html 파트만 디코딩)
+        html_body = get_html_body(payload)
         
         if not html_body:
           logging.info("⚠️ HTML 본문을 찾을 수 없습니다.")
+          if skipped_ids is not None:
+            skipped_ids.add(msg_id)
           return False
 
         # HTML에서 XPath로 특정 버튼의 href 추출
         try:
-          parser = etree.HTMLParser()
-          tree = etree.parse(StringIO(html_body), parser)
-
-          # XPath를 사용해 버튼의 href 속성 추출
-          # XPath 예: 모든 <a> 태그 중 버튼과 관련된 조건을 설정
-          hrefs = tree.xpath("//a[contains(@class, 'email-button') or contains(text(), 'Download my archive')]/@href")
+          hrefs = extract_download_links(html_body)
 
           if not hrefs:
             logging.info("⚠️ 버튼 링크를 찾을 수 없습니다.")
+            if skipped_ids is not None:
+              skipped_ids.add(msg_id)
             return False
 
           # 추출된 href 저장
@@ -180,6 +317,10 @@ def check_emails(service, sender_email, download_path, mode="attachment", search
                 logging.info(f"🔗 추출된 링크 저장됨: {href}")
         except Exception as e:
           logging.error(f"❌ HTML 파싱 중 오류 발생: {e}")
+          # 링크를 저장하지 못한 메일은 읽음 처리하지 않고 이번 실행에서만 건너뜀
+          if skipped_ids is not None:
+            skipped_ids.add(msg_id)
+          return False
 
       try:
         service.users().messages().modify(userId="me", id=msg_id, body={"removeLabelIds": ["UNREAD"]}).execute()
@@ -187,6 +328,10 @@ def check_emails(service, sender_email, download_path, mode="attachment", search
       except HttpError as e:
         logging.error(f"❌ 읽음 처리 실패 (메일 ID: {msg_id}): {e}")
 
+      # 링크를 저장한 메일만 처리한 것으로 기록
+      if mode == "body" and processed_ids is not None:
+        processed_ids.add(msg_id)
+
     return True
   except HttpError as error:
     logging.error(f"❌ API 오류 발생: {error}")
@@ -203,6 +348,8 @@ def download_file_from_link(link, download_path):
   Returns:
       str: 다운로드된 파일의 경로.
   """
+  import requests
+
   try:
     # 요청 보내기
     logging.info(f"다운로드 요청: {link}")
@@ -245,23 +392,50 @@ def process_links_and_download(links, download_path):
     else:
       logging.warning(f"다운로드 실패: {link}")
 
-def main():
-  sender_email = "noreply@medium.com"
-  download_path = "downloads"
-  interval = 1
+def watch(sender_email="noreply@medium.com", download_path="downloads", interval=1,
+          credentials_path="credentials.json", token_path="token.json", interactive=True):
+  """
+  조건에 맞는 메일을 찾을 때까지 interval 분 간격으로 Gmail 을 확인합니다.
+
+  Args:
+      sender_email: 확인할 발신자 이메일 주소.
+      download_path: 첨부파일/링크 저장 경로.
+      interval: 확인 간격(분).
+      credentials_path: OAuth 클라이언트 정보 파일 경로.
+      token_path: 계정별 인증 토큰 파일 경로.
+      interactive: 토큰이 없거나 만료됐을 때 브라우저 OAuth 흐름을 시작할지 여부.
+  """
+  from googleapiclient.discovery import build
 
   if not os.path.exists(download_path):
     os.makedirs(download_path)
 
-  creds = authenticate_gmail()
+  # 서비스 객체는 스레드 간에 공유하지 않고 호출마다 새로 생성
+  creds = authenticate_gmail(credentials_path, token_path, interactive)
   service = build("gmail", "v1", credentials=creds)
 
+  # 읽음 처리가 실패해도(readonly 권한 등) 같은 메일을 다시 분석하지 않도록 처리한 ID 를 기록
+  # 링크를 찾지 못한 메일은 기록하지 않고 이번 실행에서만 건너뜀 (XPath 등을 고친 뒤 다시 확인)
+  processed_ids_path = os.path.join(download_path, PROCESSED_IDS_FILE)
+  processed_ids = load_processed_ids(processed_ids_path)
+  skipped_ids = set()
+
   while True:
-    if check_emails(service, sender_email, download_path, mode="body", search_query="subject:'Medium download request' is:unread"):
+    before = set(processed_ids)
+    found = check_emails(service, sender_email, download_path, mode="body", search_query="subject:'Medium download request' is:unread", processed_ids=processed_ids, skipped_ids=skipped_ids)
+    for msg_id in processed_ids - before:
+      save_processed_id(processed_ids_path, msg_id)
+    if found:
       break
     else:
       logging.info(f"첨부파일이 있는 메일을 찾지 못했습니다. {interval} 분 후 다시 시도합니다.")
       time.sleep(60 * interval)
 
+def main():
+  setup_logging(LOG_FILE)
+  enable_profiling_from_argv()
+
+  watch()
+
 if __name__ == "__main__":
   main()
@@ -0,0 +1,167 @@
+import os
+import io
+import gzip
+import mmap
+import json
+import datetime
+
+# ✅ 선택적 의존성: orjson(빠른 인코더), zstandard(zstd 압축)
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+
+def _default(value):
+  """
+  JSON 기본 타입이 아닌 값을 변환합니다. orjson 유무와 상관없이 같은 결과가 나오도록
+  두 인코더 모두 이 함수를 사용합니다. (datetime/date → isoformat, 그 외 → str)
+  """
+  if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+    return value.isoformat()
+  return str(value)
+
+
+def _dumps(record):
+  """ 레코드 한 건을 JSON 한 줄(bytes)로 직렬화합니다. """
+  if orjson is not None:
+    return orjson.dumps(record, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME) + b"\n"
+  return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8") + b"\n"
+
+
+def _loads(line):
+  """ JSON 한 줄(bytes)을 레코드로 역직렬화합니다. """
+  if orjson is not None:
+    return orjson.loads(line)
+  return json.loads(line)
+
+
+def detect_compression(path):
+  """ 파일 확장자로 압축 방식을 판단합니다. (".zst" → zstd, ".gz" → gzip) """
+  if path.endswith(".zst"):
+    return "zstd"
+  if path.endswith(".gz"):
+    return "gzip"
+  return None
+
+
+def _open_binary(path, mode, compression):
+  if compression == "zstd":
+    if zstandard is None:
+      raise RuntimeError("zstd 압축을 사용하려면 zstandard 패키지가 필요합니다.")
+    if "w" in mode:
+      return zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+  if compression == "gzip":
+    return gzip.open(path, mode + "b")
+  return open(path, mode + "b")
+
+
+class JsonlWriter:
+  """
+  레코드를 한 줄씩 JSON Lines 파일에 기록하는 writer.
+  임시 파일에 쓴 뒤 close 시점에 원자적으로 교체하므로, 중간에 실패해도 기존 스냅샷이 깨지지 않습니다.
+
+  사용 예:
+      with JsonlWriter("all_links.jsonl") as writer:
+        writer.write_many(links)
+  """
+
+  def __init__(self, path, compression=None):
+    self.path = path
+    self.compression = compression or detect_compression(path)
+    self.count = 0
+    self._tmp_path = f"{path}.tmp"
+    self._file = _open_binary(self._tmp_path, "w", self.compression)
+
+  def write(self, record):
+    self._file.write(_dumps(record))
+    self.count += 1
+
+  def write_many(self, records):
+    for record in records:
+      self.write(record)
+
+  def close(self):
+    if self._file is None:
+      return
+    self._file.close()
+    self._file = None
+    os.replace(self._tmp_path, self.path)
+
+  def abort(self):
+    if self._file is None:
+      return
+    self._file.close()
+    self._file = None
+    os.remove(self._tmp_path)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    if exc_type is None:
+      self.close()
+    else:
+      self.abort()
+
+
+def write_jsonl(records, path, compression=None):
+  """
+  레코드 이터러블을 JSON Lines 파일로 저장합니다.
+
+  :param records: dict 레코드의 이터러블 (제너레이터도 가능)
+  :param path: 저장할 파일 경로
+  :param compression: None, "gzip", "zstd" (기본값: 확장자로 판단)
+  :return: 기록된 레코드 수
+  """
+  with JsonlWriter(path, compression) as writer:
+    writer.write_many(records)
+  return writer.count
+
+
+def iter_jsonl(path, compression=None):
+  """
+  JSON Lines 파일을 한 줄씩 읽어 레코드를 순차적으로 반환합니다.
+  압축되지 않은 파일은 mmap으로 읽어 전체를 메모리에 올리지 않습니다.
+  """
+  compression = compression or detect_compression(path)
+
+  if compression is None:
+    with open(path, "rb") as file:
+      if os.fstat(file.fileno()).st_size == 0:
+        return
+      with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b""):
+          if line.strip():
+            yield _loads(line)
+    return
+
+  with _open_binary(path, "r", compression) as file:
+    for line in file:
+      if line.strip():
+        yield _loads(line)
+
+
+def iter_records(path, compression=None):
+  """
+  파일의 레코드를 순차적으로 반환합니다. JSON Lines 는 한 줄씩 읽습니다.
+  기존 형식(들여쓰기된 JSON 배열, ".json")은 배열 전체를 읽은 뒤 순회합니다.
+  """
+  if path.endswith(".json"):
+    with open(path, "r", encoding="utf-8") as file:
+      yield from json.load(file)
+    return
+  yield from iter_jsonl(path, compression)
+
+
+def load_records(path, compression=None):
+  """
+  파일을 읽어 레코드 리스트로 반환합니다. (전체 목록이 필요할 때만 사용하고, 순회만 하면 iter_records)
+  """
+  return list(iter_records(path, compression))
@@ -0,0 +1,142 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+# log settings
+LOG_DIR = "logs"
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(threadName)s - %(name)s - %(message)s%(fields_text)s"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_listener = None
+
+
+class StructuredFormatter(logging.Formatter):
+  """
+  `extra={"fields": {...}}`로 전달된 구조화 필드를 메시지 뒤에 key=value 형태로 붙입니다.
+  """
+
+  def format(self, record):
+    fields = getattr(record, "fields", None)
+    if fields:
+      record.fields_text = " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+    else:
+      record.fields_text = ""
+    return super().format(record)
+
+
+def setup_logging(log_file, level=None, console_level=None):
+  """
+  QueueHandler/QueueListener 기반 로깅을 설정합니다.
+  호출 스레드는 큐에 레코드를 넣기만 하고, 파일(회전)/콘솔 출력은 별도 리스너 스레드가 처리합니다.
+
+  Args:
+      log_file (str): logs/ 아래에 생성할 로그 파일 이름.
+      level: 루트 로거 레벨 (기본값: 환경 변수 LOG_LEVEL 또는 INFO).
+      console_level: 콘솔 출력 레벨 (기본값: 환경 변수 LOG_CONSOLE_LEVEL 또는 level).
+
+  Returns:
+      logging.handlers.QueueListener: 실행 중인 리스너.
+  """
+  global _listener
+  if _listener is not None:
+    return _listener
+
+  level = level or os.environ.get("LOG_LEVEL", "INFO")
+  console_level = console_level or os.environ.get("LOG_CONSOLE_LEVEL", level)
+
+  # check log directory
+  os.makedirs(LOG_DIR, exist_ok=True)
+
+  formatter = StructuredFormatter(LOG_FORMAT)
+
+  file_handler = logging.handlers.RotatingFileHandler(
+    os.path.join(LOG_DIR, log_file),
+    maxBytes=LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT,
+    encoding="utf-8",
+  )
+  file_handler.setFormatter(formatter)
+
+  console_handler = logging.StreamHandler()
+  console_handler.setFormatter(formatter)
+  console_handler.setLevel(console_level)
+
+  log_queue = queue.SimpleQueue()
+  root = logging.getLogger()
+  root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+  root.setLevel(level)
+
+  _listener = logging.handlers.QueueListener(
+    log_queue, file_handler, console_handler, respect_handler_level=True
+  )
+  _listener.start()
+  atexit.register(stop_logging)
+  return _listener
+
+
+def stop_logging():
+  """ 큐에 남은 레코드를 모두 출력하고 리스너를 종료합니다. """
+  global _listener
+  if _listener is not None:
+    _listener.stop()
+    _listener = None
+
+
+class ProgressLogger:
+  """
+  항목 단위 작업(추가/삭제 등)의 로그를 집계합니다.
+  개별 성공은 DEBUG로만 남기고, every 건 또는 interval 초마다 INFO 요약을 한 줄 출력합니다.
+  실패는 건별로 WARNING 이상으로 남깁니다.
+  """
+
+  def __init__(self, logger, action, every=100, interval=10.0):
+    self.logger = logger
+    self.action = action
+    self.every = every
+    self.interval = interval
+    self.succeeded = 0
+    self.failed = 0
+    self._started = time.monotonic()
+    self._last_report = self._started
+    self._since_report = 0
+
+  def record(self, ok, item=""):
+    if ok:
+      self.succeeded += 1
+      self.logger.debug(f"{self.action}: {item}")
+    else:
+      self.failed += 1
+    self._since_report += 1
+
+    now = time.monotonic()
+    if self._since_report >= self.every or now - self._last_report >= self.interval:
+      self._report(now)
+
+  def _report(self, now):
+    elapsed = now - self._started
+    self.logger.info(
+      f"{self.action} 진행 중",
+      extra={"fields": {
+        "succeeded": self.succeeded,
+        "failed": self.failed,
+        "rate": f"{(self.succeeded + self.failed) / elapsed:.1f}/s" if elapsed else "-",
+      }},
+    )
+    self._last_report = now
+    self._since_report = 0
+
+  def finish(self):
+    """ 최종 요약을 출력합니다. """
+    elapsed = time.monotonic() - self._started
+    self.logger.info(
+      f"{self.action} 완료",
+      extra={"fields": {
+        "succeeded": self.succeeded,
+        "failed": self.failed,
+        "elapsed": f"{elapsed:.1f}s",
+      }},
+    )
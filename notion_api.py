@@ -1,21 +1,137 @@
 import os
-import requests
+import logging
 import time
-from dotenv import load_dotenv
 import glob
-from lxml import etree
-import json
+import threading
 from datetime import datetime
+from jsonl_store import JsonlWriter
+from log_config import ProgressLogger, setup_logging
+from profiling import enable_profiling_from_argv, profile_stage
 
-load_dotenv()
+logger = logging.getLogger("notion_api")
 
-NOTION_KEY = os.environ.get("NOTION_KEY")
-NOTION_DATABASE_ID = os.environ.get("NOTION_DATABASE_ID")
-HEADERS = {
-    "Authorization": f"Bearer {NOTION_KEY}",
-    "Content-Type": "application/json",
-    "Notion-Version": "2022-06-28",
-}
+NOTION_VERSION = "2022-06-28"
+NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", "3"))  # 통합 토큰당 초당 요청 수
+NOTION_POOL_SIZE = int(os.environ.get("NOTION_POOL_SIZE", "16"))  # 공유 커넥션 풀 크기
+NOTION_MAX_RETRIES = 3  # 429 응답 시 재시도 횟수
+
+# requests/dotenv/lxml 은 import 비용이 커서 실제로 필요한 시점에 불러옵니다.
+_config = None
+_session = None
+_limiters = {}
+_lock = threading.RLock()
+
+
+class RateLimiter:
+    """
+    스레드 안전한 토큰 버킷. 통합 토큰(NOTION_KEY)마다 하나씩 사용합니다.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        요청 한 건을 보낼 수 있을 때까지 대기합니다.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1  # 토큰이 부족하면 음수로 예약하고, 그만큼 기다림
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def get_rate_limiter(notion_key, rate=None):
+    """
+    통합 토큰별 RateLimiter 를 반환합니다. 같은 토큰을 쓰는 작업은 하나의 limiter 를 공유합니다.
+
+    :param rate: 초당 요청 수 (기본값: NOTION_RATE_LIMIT). 처음 만들 때만 적용됩니다.
+    """
+    with _lock:
+        if notion_key not in _limiters:
+            _limiters[notion_key] = RateLimiter(rate or NOTION_RATE_LIMIT)
+        return _limiters[notion_key]
+
+
+def make_config(notion_key, database_id, rate=None):
+    """
+    통합 토큰과 데이터베이스 ID 로 Notion 설정을 만듭니다.
+    같은 토큰을 여러 프로세스가 나눠 쓰면 rate 로 프로세스당 몫을 지정합니다.
+
+    :return: {"database_id": ..., "headers": {...}, "limiter": RateLimiter}
+    """
+    return {
+        "database_id": database_id,
+        "headers": {
+            "Authorization": f"Bearer {notion_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_VERSION,
+        },
+        "limiter": get_rate_limiter(notion_key, rate),
+    }
+
+
+def get_config():
+    """
+    .env 와 환경 변수에서 기본 Notion 설정을 읽어 반환합니다. (최초 호출 시 한 번만 로드)
+    """
+    global _config
+    with _lock:
+        if _config is None:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _config = make_config(
+                os.environ.get("NOTION_KEY"), os.environ.get("NOTION_DATABASE_ID")
+            )
+    return _config
+
+
+def get_session():
+    """
+    Notion API 호출에 재사용할 requests.Session 을 반환합니다.
+    여러 작업(스레드)이 하나의 커넥션 풀을 공유합니다.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            _session.mount(
+                "https://",
+                HTTPAdapter(pool_connections=1, pool_maxsize=NOTION_POOL_SIZE),
+            )
+    return _session
+
+
+def notion_request(method, url, config=None, payload=None):
+    """
+    설정의 rate limiter 를 거쳐 Notion API 를 호출합니다.
+    429 응답을 받으면 Retry-After 만큼 기다렸다가 재시도합니다.
+
+    :return: requests.Response
+    """
+    config = config or get_config()
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        config["limiter"].acquire()
+        response = get_session().request(
+            method, url, headers=config["headers"], json=payload
+        )
+        if response.status_code != 429 or attempt == NOTION_MAX_RETRIES:
+            return response
+
+        wait = float(response.headers.get("Retry-After", 1))
+        logger.warning(f"⏳ Rate limited, retrying in {wait}s", extra={"fields": {"url": url}})
+        time.sleep(wait)
 
 
 # ✅ 안전한 데이터 접근 함수
@@ -36,12 +152,13 @@ def safe_get(data, keys, default=""):
     return data if data else default
 
 
-def paginate_notion_api(url, payload=None):
+def paginate_notion_api(url, payload=None, config=None):
     """
     Notion API의 페이지네이션을 처리하는 공통 함수.
 
     :param url: API 호출 URL
     :param payload: 요청에 사용할 추가 데이터 (기본값: None)
+    :param config: Notion 설정 (기본값: get_config())
     :return: 페이지네이션을 통해 수집된 모든 항목의 리스트
     """
     all_results = []
@@ -52,17 +169,17 @@ def paginate_notion_api(url, payload=None):
         if next_cursor:
             current_payload["start_cursor"] = next_cursor
 
-        response = requests.post(url, headers=HEADERS, json=current_payload)
+        response = notion_request("POST", url, config, current_payload)
 
         if response.status_code != 200:
-            print(f"❌ Failed to fetch data: {response.json()}")
+            logger.error(f"❌ Failed to fetch data: {response.json()}")
             break
 
         data = response.json()
         results = data.get("results", [])
         all_results.extend(results)
 
-        print(f"✅ Fetched {len(results)} items (Total: {len(all_results)})")
+        logger.info(f"✅ Fetched {len(results)} items (Total: {len(all_results)})")
 
         if data.get("has_more", False):
             next_cursor = data.get("next_cursor")
@@ -73,13 +190,15 @@ def paginate_notion_api(url, payload=None):
 
 
 # ✅ Notion 데이터베이스에서 항목 가져오기 (페이지네이션 지원)
-def fetch_notion_database():
+@profile_stage("fetch_notion_database")
+def fetch_notion_database(config=None):
     """
     Notion 데이터베이스에서 항목을 모두 가져와 old_list로 반환합니다.
     """
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
+    config = config or get_config()
+    url = f"https://api.notion.com/v1/databases/{config['database_id']}/query"
 
-    results = paginate_notion_api(url)
+    results = paginate_notion_api(url, config=config)
 
     old_list = []
 
@@ -105,21 +224,24 @@ def fetch_notion_database():
                 }
             )
 
-    print(f"✅ Fetched {len(results)} items (Total: {len(old_list)})")
+    logger.info(f"✅ Fetched {len(results)} items (Total: {len(old_list)})")
 
-    print(f"✅ Completed fetching all items from Notion (Total: {len(old_list)})")
+    logger.info(f"✅ Completed fetching all items from Notion (Total: {len(old_list)})")
     return old_list
 
 
 # ✅ Notion에 항목 추가
-def add_to_notion_database(item):
+def add_to_notion_database(item, config=None):
     """
     Notion 데이터베이스에 항목을 추가합니다.
+
+    :return: 성공 여부 (True/False)
     """
+    config = config or get_config()
     url = "https://api.notion.com/v1/pages"
 
     payload = {
-        "parent": {"database_id": NOTION_DATABASE_ID},
+        "parent": {"database_id": config["database_id"]},
         "properties": {
             "title": {"title": [{"text": {"content": item["title"]}}]},
             "url": {"url": item["url"]},
@@ -127,69 +249,88 @@ def add_to_notion_database(item):
         },
     }
 
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = notion_request("POST", url, config, payload)
     if response.status_code == 200:
-        print(f"✅ Added to Notion: {item['title']}")
-    else:
-        print(f"❌ Failed to add to Notion: {item['title']}")
-        print(response.json())
+        logger.debug(f"✅ Added to Notion: {item['title']}")
+        return True
+
+    logger.error(
+        f"❌ Failed to add to Notion: {item['title']}",
+        extra={"fields": {"status": response.status_code, "url": item["url"], "response": response.text}},
+    )
+    return False
 
 
 # ✅ Notion 항목 삭제
-def delete_from_notion_database(item_id):
+def delete_from_notion_database(item_id, config=None):
     """
     Notion 데이터베이스 항목을 삭제합니다.
+
+    :return: 성공 여부 (True/False)
     """
     url = f"https://api.notion.com/v1/pages/{item_id}"
     payload = {"archived": True}
 
-    response = requests.patch(url, headers=HEADERS, json=payload)
+    response = notion_request("PATCH", url, config, payload)
     if response.status_code == 200:
-        print(f"✅ Removed from Notion: {item_id}")
-    else:
-        print(f"❌ Failed to remove from Notion: {item_id}")
-        print(response.json())
+        logger.debug(f"✅ Removed from Notion: {item_id}")
+        return True
+
+    logger.error(
+        f"❌ Failed to remove from Notion: {item_id}",
+        extra={"fields": {"status": response.status_code, "response": response.text}},
+    )
+    return False
 
 
-def delete_all_notion_items():
+def delete_all_notion_items(config=None):
     """
     Notion 데이터베이스의 모든 항목을 제거합니다.
     """
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-    results = paginate_notion_api(url)
+    config = config or get_config()
+    url = f"https://api.notion.com/v1/databases/{config['database_id']}/query"
+    results = paginate_notion_api(url, config=config)
 
+    # API Rate Limit 은 config 의 rate limiter 가 처리
+    progress = ProgressLogger(logger, "🗑️ Removing from Notion")
     for result in results:
         item_id = result.get("id", "")
         if item_id:
-            delete_from_notion_database(item_id)
-            time.sleep(0.2)  # API Rate Limit 방지를 위해 잠시 대기
+            progress.record(delete_from_notion_database(item_id, config), item_id)
+    progress.finish()
 
-    print("✅ All items in the Notion database have been deleted.")
+    logger.info("✅ All items in the Notion database have been deleted.")
 
 
 # ✅ Notion 데이터베이스 업데이트
-def update_notion_database(added, removed):
+@profile_stage("update_notion_database")
+def update_notion_database(added, removed, config=None):
     """
     Notion 데이터베이스를 업데이트합니다.
     - 추가된 항목은 추가
     - 삭제된 항목은 삭제
     """
+    progress = ProgressLogger(logger, "➕ Adding to Notion")
     for item in added:
-        add_to_notion_database(item)
+        progress.record(add_to_notion_database(item, config), item["title"])
+    progress.finish()
 
+    progress = ProgressLogger(logger, "➖ Removing from Notion")
     for item in removed:
-        delete_from_notion_database(item["id"])
+        progress.record(delete_from_notion_database(item["id"], config), item["id"])
+    progress.finish()
 
 
-def check_item_exists_in_notion(property_name, value):
+def check_item_exists_in_notion(property_name, value, config=None):
     """
     Notion 데이터베이스에서 특정 속성(property_name)의 값(value)이 존재하는지 확인합니다.
 
     :param property_name: 필터링할 속성 이름 (예: 'URL', 'title')
     :param value: 필터링할 값 (예: 특정 URL, 제목)
-    :return: 존재 여부 (True/False)
+    :return: 존재 여부 (True/False), 조회에 실패하면 None
     """
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
+    config = config or get_config()
+    url = f"https://api.notion.com/v1/databases/{config['database_id']}/query"
 
     payload = {
         "filter": {
@@ -198,20 +339,20 @@ def check_item_exists_in_notion(property_name, value):
         }
     }
 
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = notion_request("POST", url, config, payload)
 
     if response.status_code != 200:
-        print(f"❌ Failed to check item existence: {response.json()}")
-        return False
+        logger.error(f"❌ Failed to check item existence: {response.json()}")
+        return None
 
     data = response.json()
     results = data.get("results", [])
 
     if results:
-        print(f"✅ Item exists with {property_name} = {value}")
+        logger.info(f"✅ Item exists with {property_name} = {value}")
         return True
     else:
-        print(f"❌ Item does not exist with {property_name} = {value}")
+        logger.info(f"❌ Item does not exist with {property_name} = {value}")
         return False
 
 
@@ -220,6 +361,8 @@ def extract_links_from_html(file_path):
     """
     XPath를 사용하여 HTML 파일에서 <body> → <section> → <ul> → <li> → <a> 구조로 URL과 제목을 추출합니다.
     """
+    from lxml import etree
+
     links = []  # 결과를 저장할 리스트
     date_format = "%Y-%m-%d %I:%M %p"
 
@@ -250,30 +393,35 @@ def extract_links_from_html(file_path):
 
 
 # ✅ 여러 HTML 파일에서 URL과 제목을 추출
-def process_multiple_html_files(directory, file_pattern="bookmarks-*.html"):
+@profile_stage("process_multiple_html_files")
+def process_multiple_html_files(
+    directory, file_pattern="bookmarks-*.html", output_file="all_links.jsonl"
+):
   """
   주어진 디렉터리에서 여러 HTML 파일을 읽고 URL과 제목을 추출합니다.
+  추출된 링크는 파일 단위로 output_file(JSON Lines)에 바로 기록됩니다.
   """
   all_links = []  # 모든 링크를 저장할 리스트
 
   # 파일 패턴에 맞는 모든 HTML 파일 찾기
   file_paths = glob.glob(os.path.join(directory, file_pattern))
 
-  for file_path in file_paths:
-    print(f"📄 Processing: {file_path}")
-    links = extract_links_from_html(file_path)
-    all_links.extend(links)  # 추출된 링크를 전체 리스트에 추가
-
-  with open("all_links.json", "w", encoding="utf-8") as jsonfile:
-    json.dump(all_links, jsonfile, indent=2, ensure_ascii=False)
+  with JsonlWriter(output_file) as writer:
+    for file_path in file_paths:
+      logger.info(f"📄 Processing: {file_path}")
+      links = extract_links_from_html(file_path)
+      writer.write_many(links)
+      all_links.extend(links)  # 추출된 링크를 전체 리스트에 추가
 
   return all_links
 
 
 # ✅ 글로벌 비교 로직
+@profile_stage("global_diff_update")
 def global_diff_update(old_list, new_list):
     """
     old_list(Notion DB)와 new_list(로컬 데이터)를 비교하여 added, removed, unchanged를 도출합니다.
+    두 목록은 한 번씩만 순회하므로 jsonl_store.iter_records 의 이터레이터도 넘길 수 있습니다.
     """
     old_map = {item["url"]: item for item in old_list}
     new_map = {item["url"]: item for item in new_list}
@@ -282,30 +430,35 @@ def global_diff_update(old_list, new_list):
     removed = [item for url, item in old_map.items() if url not in new_map]
     unchanged = [item for url, item in new_map.items() if url in old_map]
 
-    print(
-        f"✅ Comparison complete: Added: {len(added)}, Removed: {len(removed)}, Unchanged: {len(unchanged)}"
+    logger.info(
+        "✅ Comparison complete",
+        extra={"fields": {"added": len(added), "removed": len(removed), "unchanged": len(unchanged)}},
     )
 
     return added, removed, unchanged
 
 
-# ✅ 메인 실행
-if __name__ == "__main__":
-    # HTML 파일들이 저장된 디렉터리 경로 설정
-    input_directory = "./bookmarks"
+# ✅ 전체 동기화
+def sync(input_directory="./bookmarks", config=None, output_file="all_links.jsonl"):
+    """
+    로컬 북마크 HTML 파일을 기준으로 Notion 데이터베이스를 동기화합니다.
 
+    :param input_directory: HTML 파일들이 저장된 디렉터리 경로
+    :param config: Notion 설정 (기본값: get_config())
+    :param output_file: 추출한 링크를 저장할 JSON Lines 파일 경로
+    """
     # ✅ Step 1: Notion 데이터베이스에서 old_list 가져오기
-    old_list = fetch_notion_database()
+    old_list = fetch_notion_database(config)
 
     # ✅ Step 2: 로컬 HTML 파일에서 new_list 가져오기
-    new_list = process_multiple_html_files(input_directory)
-    print(f"✅ Loaded {len(new_list)} items from bookmarks.")
+    new_list = process_multiple_html_files(input_directory, output_file=output_file)
+    logger.info(f"✅ Loaded {len(new_list)} items from bookmarks.")
 
     # ✅ Step 3: 글로벌 비교 수행
     added, removed, unchanged = global_diff_update(old_list, new_list)
 
     # ✅ Step 4: Notion 업데이트 수행
-    update_notion_database(added, removed)
+    update_notion_database(added, removed, config)
 
     # ✅ check item
     # url_to_check = "https://medium.com/p/building-robust-api-clients-with-refit-rest-library-in-c-43862c4cad76"
@@ -315,4 +468,13 @@ if __name__ == "__main__":
     # else:
     #     print("❌ The item does not exist. You can safely add it.")
 
-    print("\n🎯 Database synchronization complete!")
+    logger.info("🎯 Database synchronization complete!")
+
+
+# ✅ 메인 실행
+if __name__ == "__main__":
+    setup_logging("notion_sync.log")
+    enable_profiling_from_argv()
+
+    # HTML 파일들이 저장된 디렉터리 경로 설정
+    sync("./bookmarks")
@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import itertools
+import threading
+import functools
+from datetime import datetime
+
+from log_config import LOG_DIR
+
+logger = logging.getLogger("profiling")
+
+PROFILE_DIR = os.path.join(LOG_DIR, "profile")
+PROFILE_SUMMARY_FILE = os.path.join(LOG_DIR, "profile_summary.jsonl")
+
+# 프로파일링 설정 (환경 변수 또는 --profile 플래그로 활성화)
+#   PROFILE=1                  : 단계별 wall/CPU 시간 측정
+#   PROFILE_SAMPLE_RATE=0.1    : cProfile/tracemalloc 을 실행할 호출 비율 (0.0 ~ 1.0, 기본값 0.1)
+#   PROFILE_CPROFILE=0         : 샘플링된 호출에서 cProfile(.prof) 저장 끄기
+#   PROFILE_TRACEMALLOC=0      : 샘플링된 호출에서 tracemalloc 최대 메모리 측정 끄기
+_config = {
+  "enabled": os.environ.get("PROFILE", "0") == "1",
+  "sample_rate": float(os.environ.get("PROFILE_SAMPLE_RATE", "0.1")),
+  "cprofile": os.environ.get("PROFILE_CPROFILE", "1") == "1",
+  "tracemalloc": os.environ.get("PROFILE_TRACEMALLOC", "1") == "1",
+}
+
+# cProfile/tracemalloc 캡처는 프로세스 전체에서 한 번에 하나의 단계만 수행
+# (중첩된 단계나 다른 스레드의 단계는 시간만 측정)
+_capturing = False
+# 스레드별 실행 중인 단계 수, 캡처 중인 스레드, 캡처 도중 다른 스레드의 단계가 실행됐는지 여부
+_active_stages = {}
+_capture_thread = None
+_capture_overlapped = False
+_lock = threading.Lock()
+_prof_seq = itertools.count(1)
+
+
+def configure_profiling(enabled=None, sample_rate=None, cprofile=None, tracemalloc=None):
+  """ 프로파일링 설정을 변경합니다. None 인 인자는 기존 값을 유지합니다. """
+  for key, value in (
+    ("enabled", enabled),
+    ("sample_rate", sample_rate),
+    ("cprofile", cprofile),
+    ("tracemalloc", tracemalloc),
+  ):
+    if value is not None:
+      _config[key] = value
+
+
+def enable_profiling_from_argv(argv=None):
+  """
+  명령행 인자에서 --profile 플래그를 찾아 프로파일링을 켜고, 플래그를 제거한 인자 목록을 반환합니다.
+  """
+  argv = list(sys.argv[1:] if argv is None else argv)
+  if "--profile" in argv:
+    argv.remove("--profile")
+    configure_profiling(enabled=True)
+  return argv
+
+
+def _write_summary(summary):
+  os.makedirs(LOG_DIR, exist_ok=True)
+  line = json.dumps(summary, ensure_ascii=False) + "\n"
+  with _lock:
+    with open(PROFILE_SUMMARY_FILE, "a", encoding="utf-8") as file:
+      file.write(line)
+
+
+def profile_stage(name):
+  """
+  함수 실행을 하나의 단계(stage)로 측정하는 데코레이터.
+  비활성화 상태에서는 설정 값 확인 외에 추가 비용이 없습니다.
+
+  활성화되면 호출마다 wall 시간과 호출 스레드의 CPU 시간을 logs/profile_summary.jsonl 에 기록하고,
+  sample_rate 비율로 선택된 호출은 cProfile 결과(logs/profile/<stage>-<시간>-<pid>-<스레드>-<번호>.prof)와
+  tracemalloc 최대 메모리도 함께 남깁니다. tracemalloc 은 프로세스 전체를 측정하므로, 캡처 도중
+  다른 단계가 실행됐다면 summary 의 peak_mem_shared 가 true 입니다.
+  """
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      global _capturing, _capture_thread, _capture_overlapped
+      if not _config["enabled"]:
+        return func(*args, **kwargs)
+
+      thread_id = threading.get_ident()
+      with _lock:
+        _active_stages[thread_id] = _active_stages.get(thread_id, 0) + 1
+        if _capturing and _capture_thread != thread_id:
+          _capture_overlapped = True
+        capture = not _capturing and random.random() < _config["sample_rate"]
+        if capture:
+          _capturing = True
+          _capture_thread = thread_id
+          _capture_overlapped = any(other != thread_id for other in _active_stages)
+
+      profiler = None
+      trace_started = False
+      if capture:
+        # 프로파일링이 꺼져 있을 때는 불러올 필요가 없으므로 여기서 import
+        import cProfile
+        import tracemalloc
+
+        if _config["tracemalloc"] and not tracemalloc.is_tracing():
+          tracemalloc.start()
+          trace_started = True
+        if _config["cprofile"]:
+          profiler = cProfile.Profile()
+          profiler.enable()
+
+      started_at = datetime.now()
+      wall_start = time.perf_counter()
+      cpu_start = time.thread_time()
+      error = None
+      try:
+        return func(*args, **kwargs)
+      except BaseException as e:
+        error = repr(e)
+        raise
+      finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+
+        summary = {
+          "stage": name,
+          "started_at": started_at.isoformat(),
+          "pid": os.getpid(),
+          "thread": threading.current_thread().name,
+          "wall_s": round(wall, 6),
+          "cpu_s": round(cpu, 6),
+          "sampled": capture,
+        }
+
+        if profiler is not None:
+          profiler.disable()
+          os.makedirs(PROFILE_DIR, exist_ok=True)
+          prof_path = os.path.join(
+            PROFILE_DIR,
+            f"{name}-{started_at:%Y%m%d-%H%M%S}-{os.getpid()}-{thread_id}-{next(_prof_seq)}.prof",
+          )
+          profiler.dump_stats(prof_path)
+          summary["prof_file"] = prof_path
+        if trace_started:
+          _, peak = tracemalloc.get_traced_memory()
+          tracemalloc.stop()
+          summary["peak_mem_bytes"] = peak
+
+        with _lock:
+          _active_stages[thread_id] -= 1
+          if not _active_stages[thread_id]:
+            del _active_stages[thread_id]
+          if capture:
+            summary["peak_mem_shared"] = _capture_overlapped
+            _capturing = False
+            _capture_thread = None
+            _capture_overlapped = False
+        if error:
+          summary["error"] = error
+
+        _write_summary(summary)
+        logger.info(f"⏱️ Stage {name}", extra={"fields": summary})
+
+    return wrapper
+  return decorator
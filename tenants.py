@@ -0,0 +1,152 @@
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import notion_api
+
+logger = logging.getLogger("tenants")
+
+# ✅ 여러 팀원(테넌트)의 동기화 작업을 한 프로세스에서 동시에 실행
+#
+# 설정 파일 예시는 tenants.example.json 참고.
+#   - notion_key 또는 notion_key_env(환경 변수 이름)로 통합 토큰 지정
+#   - bookmarks_dir 가 있으면 Notion 동기화 작업 실행
+#   - gmail 항목이 있으면 해당 계정의 Gmail 확인 작업 실행
+#     (메일이 올 때까지 끝나지 않으므로 동기화 작업 풀과 분리된 전용 스레드에서 실행하고,
+#      브라우저 인증은 하지 않음 — token_path 에 미리 인증한 토큰 파일이 있어야 함)
+# 통합 토큰마다 별도 rate limiter 를 쓰고, HTTP 커넥션 풀은 모든 작업이 공유합니다.
+
+
+def load_tenants(config_path):
+  """
+  테넌트 설정 파일(JSON)을 읽어 테넌트 목록을 반환합니다.
+
+  Args:
+      config_path (str): 설정 파일 경로.
+
+  Returns:
+      list: 테넌트 설정(dict) 목록.
+  """
+  from dotenv import load_dotenv
+
+  load_dotenv()
+
+  with open(config_path, "r", encoding="utf-8") as file:
+    tenants = json.load(file)["tenants"]
+
+  names = [tenant["name"] for tenant in tenants]
+  if len(names) != len(set(names)):
+    raise ValueError(f"테넌트 이름이 중복되었습니다: {names}")
+
+  for tenant in tenants:
+    if "notion_key_env" in tenant:
+      tenant["notion_key"] = os.environ.get(tenant["notion_key_env"])
+    if tenant.get("bookmarks_dir") and not (tenant.get("notion_key") and tenant.get("database_id")):
+      raise ValueError(f"테넌트 {tenant['name']}: notion_key 와 database_id 가 필요합니다.")
+    if tenant.get("gmail"):
+      token_path = _gmail_token_path(tenant)
+      if not os.path.exists(token_path):
+        raise ValueError(
+          f"테넌트 {tenant['name']}: Gmail 토큰 파일 {token_path} 이 없습니다."
+          " gmail-watch 로 먼저 인증해 토큰을 만드세요."
+        )
+  return tenants
+
+
+def _gmail_token_path(tenant):
+  return tenant["gmail"].get("token_path", f"token-{tenant['name']}.json")
+
+
+def _notion_sync_job(tenant):
+  config = notion_api.make_config(tenant["notion_key"], tenant["database_id"])
+  notion_api.sync(
+    tenant["bookmarks_dir"],
+    config=config,
+    output_file=tenant.get("output_file", f"all_links-{tenant['name']}.jsonl"),
+  )
+
+
+def _gmail_watch_job(tenant):
+  import gmail_check
+
+  gmail = tenant["gmail"]
+  gmail_check.watch(
+    sender_email=gmail.get("sender", "noreply@medium.com"),
+    download_path=gmail.get("download_path", os.path.join("downloads", tenant["name"])),
+    interval=gmail.get("interval", 1),
+    credentials_path=gmail.get("credentials_path", "credentials.json"),
+    token_path=_gmail_token_path(tenant),
+    interactive=False,
+  )
+
+
+def _run_job(name, job, tenant):
+  # 로그에서 어느 테넌트의 작업인지 구분할 수 있도록 스레드 이름 지정
+  threading.current_thread().name = f"{tenant['name']}:{name}"
+  job(tenant)
+
+
+def _run_pool(executor, jobs, results):
+  futures = {
+    executor.submit(_run_job, name, job, tenant): f"{tenant['name']}:{name}"
+    for name, job, tenant in jobs
+  }
+  for future in as_completed(futures):
+    key = futures[future]
+    try:
+      future.result()
+      results[key] = True
+      logger.info(f"✅ 작업 완료: {key}")
+    except Exception:
+      results[key] = False
+      logger.exception(f"❌ 작업 실패: {key}")
+
+
+def run_tenants(tenants, max_workers=None):
+  """
+  테넌트별 작업을 스레드 풀에서 동시에 실행합니다.
+  Notion 동기화 작업은 max_workers 크기의 풀에서, Gmail 확인 작업은 작업마다 전용 스레드에서 실행해
+  메일을 기다리는 작업이 동기화 작업을 막지 않도록 합니다.
+
+  Args:
+      tenants (list): load_tenants 가 반환한 테넌트 목록.
+      max_workers (int): 동시에 실행할 동기화 작업 수 (기본값: 전체 동기화 작업 수).
+
+  Returns:
+      dict: "테넌트:작업" → 성공 여부.
+  """
+  sync_jobs = [("sync", _notion_sync_job, tenant) for tenant in tenants if tenant.get("bookmarks_dir")]
+  watch_jobs = [("gmail-watch", _gmail_watch_job, tenant) for tenant in tenants if tenant.get("gmail")]
+
+  if not sync_jobs and not watch_jobs:
+    logger.warning("⚠️ 실행할 작업이 없습니다.")
+    return {}
+
+  results = {}
+  watch_executor = None
+  watch_thread = None
+  if watch_jobs:
+    watch_executor = ThreadPoolExecutor(max_workers=len(watch_jobs))
+    watch_thread = threading.Thread(
+      target=_run_pool, args=(watch_executor, watch_jobs, results), name="gmail-watchers"
+    )
+    watch_thread.start()
+
+  if sync_jobs:
+    with ThreadPoolExecutor(max_workers=max_workers or len(sync_jobs)) as executor:
+      _run_pool(executor, sync_jobs, results)
+
+  if watch_thread is not None:
+    watch_thread.join()
+    watch_executor.shutdown()
+
+  logger.info(
+    "🎯 모든 테넌트 작업 종료",
+    extra={"fields": {
+      "succeeded": sum(results.values()),
+      "failed": len(results) - sum(results.values()),
+    }},
+  )
+  return results
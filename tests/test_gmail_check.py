@@ -0,0 +1,138 @@
+import os
+import sys
+import base64
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gmail_check
+
+LINK = "https://medium.com/me/export/download"
+BUTTON_HTML = f'<html><body><a class="email-button" href="{LINK}">Download my archive</a></body></html>'
+
+
+def _encode(text):
+  return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+class FakeGmail:
+  """ check_emails 가 사용하는 Gmail API 호출만 흉내 내는 서비스 객체 """
+
+  def __init__(self, messages):
+    self.messages_by_id = messages
+    self.modified = []
+
+  def users(self):
+    return self
+
+  def messages(self):
+    return self
+
+  def list(self, userId, q):
+    return _Request({"messages": [{"id": msg_id} for msg_id in self.messages_by_id]})
+
+  def get(self, userId, id):
+    return _Request({"id": id, "payload": self.messages_by_id[id]})
+
+  def modify(self, userId, id, body):
+    self.modified.append(id)
+    return _Request({})
+
+
+class _Request:
+  def __init__(self, result):
+    self.result = result
+
+  def execute(self):
+    return self.result
+
+
+def _html_message(html):
+  return {"mimeType": "text/html", "headers": [], "body": {"data": _encode(html)}}
+
+
+def test_write_base64_to_file_accepts_unpadded_input(tmp_path):
+  raw = b"hello world"  # 11 바이트 → 패딩 없이 15자
+  data = base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+  assert len(data) % 4
+
+  path = tmp_path / "out.bin"
+  assert gmail_check.write_base64_to_file(data, str(path)) == len(raw)
+  assert path.read_bytes() == raw
+  assert not os.path.exists(f"{path}.part")
+
+
+def test_write_base64_to_file_decodes_across_chunks(tmp_path):
+  raw = bytes(range(256)) * 3 + b"\xfb\xff"  # URL-safe 문자(-, _)가 나오고 마지막 청크에 패딩 필요
+  data = base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+  path = tmp_path / "out.bin"
+  assert gmail_check.write_base64_to_file(data, str(path), chunk_size=8) == len(raw)
+  assert path.read_bytes() == raw
+
+
+def test_nested_multipart_alternative():
+  payload = {
+    "mimeType": "multipart/mixed",
+    "body": {"size": 0},
+    "parts": [
+      {
+        "mimeType": "multipart/alternative",
+        "body": {"size": 0},
+        "parts": [
+          {"mimeType": "text/plain", "body": {"data": _encode("plain")}},
+          {"mimeType": "text/html", "body": {"data": _encode(BUTTON_HTML)}},
+        ],
+      },
+      {"mimeType": "application/zip", "filename": "archive.zip", "body": {"attachmentId": "att-1"}},
+    ],
+  }
+
+  mime_types = [part["mimeType"] for part in gmail_check.iter_mime_parts(payload)]
+  assert mime_types == ["multipart/mixed", "multipart/alternative", "text/plain", "text/html", "application/zip"]
+  assert gmail_check.find_html_part(payload)["mimeType"] == "text/html"
+  assert gmail_check.extract_download_links(gmail_check.get_html_body(payload)) == [LINK]
+
+
+def test_download_attachments_skips_parts_without_filename(tmp_path):
+  fetched = []
+
+  class Attachments:
+    def get(self, userId, messageId, id, fields):
+      fetched.append(id)
+      return _Request({"data": _encode("zip bytes")})
+
+  service = FakeGmail({})
+  service.attachments = Attachments
+  payload = {
+    "mimeType": "multipart/mixed",
+    "parts": [
+      {"mimeType": "image/png", "filename": "", "body": {"attachmentId": "inline-1"}},
+      {"mimeType": "text/html", "body": {"data": _encode(BUTTON_HTML)}},
+      {"mimeType": "application/zip", "filename": "archive.zip", "body": {"attachmentId": "att-1"}},
+    ],
+  }
+
+  saved = gmail_check.download_attachments(service, "msg-1", payload, str(tmp_path))
+  assert fetched == ["att-1"]
+  assert saved == [str(tmp_path / "archive.zip")]
+  assert (tmp_path / "archive.zip").read_bytes() == b"zip bytes"
+
+
+def test_check_emails_only_records_messages_with_saved_links(tmp_path):
+  pytest.importorskip("googleapiclient")
+  service = FakeGmail({"no-button": _html_message("<html><body>hi</body></html>")})
+  processed_ids, skipped_ids = set(), set()
+
+  assert not gmail_check.check_emails(service, "a@b.c", str(tmp_path), mode="body",
+                                      processed_ids=processed_ids, skipped_ids=skipped_ids)
+  assert processed_ids == set()
+  assert skipped_ids == {"no-button"}
+  assert service.modified == []
+
+  service.messages_by_id["download"] = _html_message(BUTTON_HTML)
+  assert gmail_check.check_emails(service, "a@b.c", str(tmp_path), mode="body",
+                                  processed_ids=processed_ids, skipped_ids=skipped_ids)
+  assert processed_ids == {"download"}
+  assert (tmp_path / "email_links.txt").read_text(encoding="utf-8") == LINK + "\n"
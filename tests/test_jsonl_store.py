@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extract_links
+import jsonl_store
+
+RECORDS = [{"url": f"https://example.com/{index}", "title": f"t{index}"} for index in range(3)]
+
+
+def test_iter_records_streams_jsonl(tmp_path):
+  path = str(tmp_path / "links.jsonl")
+  jsonl_store.write_jsonl(RECORDS, path)
+
+  records = jsonl_store.iter_records(path)
+  assert isinstance(records, types.GeneratorType)
+  assert list(records) == RECORDS
+  assert jsonl_store.load_records(path) == RECORDS
+
+
+def test_iter_old_list_falls_back_to_legacy_json(tmp_path):
+  with open(tmp_path / "output_links.json", "w", encoding="utf-8") as file:
+    json.dump(RECORDS, file, indent=2)
+
+  assert list(extract_links.iter_old_list(str(tmp_path / "output_links.jsonl"))) == RECORDS
+  assert list(extract_links.iter_old_list(str(tmp_path / "missing.jsonl"))) == []
+
+
+def test_global_diff_update_accepts_iterators(tmp_path):
+  path = str(tmp_path / "output_links.jsonl")
+  jsonl_store.write_jsonl(RECORDS, path)
+  new_links = RECORDS[1:] + [{"url": "https://example.com/new", "title": "new"}]
+
+  final_list, removed = extract_links.global_diff_update(extract_links.iter_old_list(path), new_links)
+  assert removed == [RECORDS[0]["url"]]
+  assert final_list == new_links
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import work_queue
+
+DATABASE_ID = "db"
+URL = "https://example.com/a"
+
+
+def _open(tmp_path):
+  return work_queue.open_queue(f"sqlite:{tmp_path / 'queue.db'}")
+
+
+def _run(backend, worker_id="w1"):
+  """ 처리 가능한 작업을 모두 임대해 완료하고, 처리한 op 순서를 반환합니다. """
+  ops = []
+  while True:
+    tasks = backend.lease(worker_id, 10)
+    if not tasks:
+      return ops
+    for task in tasks:
+      ops.append(task["op"])
+      assert backend.complete(task["id"], worker_id)
+
+
+def test_enqueue_ignores_live_duplicates(tmp_path):
+  backend = _open(tmp_path)
+  assert backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})]) == 1
+  assert backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})]) == 0
+
+  backend.lease("w1", 10)
+  assert backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})]) == 0
+  assert backend.stats()["counts"] == {"leased": 1}
+
+
+def test_add_archive_add(tmp_path):
+  backend = _open(tmp_path)
+  item = {"url": URL, "id": "page-1"}
+
+  assert work_queue.enqueue_diff(backend, [item], [], DATABASE_ID) == 1
+  assert _run(backend) == ["add"]
+  assert work_queue.enqueue_diff(backend, [], [item], DATABASE_ID) == 1
+  assert _run(backend) == ["archive"]
+  assert work_queue.enqueue_diff(backend, [item], [], DATABASE_ID) == 1
+  assert _run(backend) == ["add"]
+  assert backend.stats()["counts"] == {"done": 2}
+
+
+def test_readded_task_runs_after_pending_archive(tmp_path):
+  backend = _open(tmp_path)
+  item = {"url": URL, "id": "page-1"}
+
+  work_queue.enqueue_diff(backend, [item], [], DATABASE_ID)
+  _run(backend)
+  work_queue.enqueue_diff(backend, [], [item], DATABASE_ID)
+  time.sleep(0.01)
+  work_queue.enqueue_diff(backend, [item], [], DATABASE_ID)
+  assert _run(backend) == ["archive", "add"]
+
+
+def test_failed_task_is_retried_after_enqueue(tmp_path):
+  backend = _open(tmp_path)
+  backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})])
+  task, = backend.lease("w1", 10)
+  assert backend.fail(task["id"], "w1", "boom", max_attempts=1)
+  assert backend.stats()["counts"] == {"failed": 1}
+
+  assert backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})]) == 1
+  task, = backend.lease("w1", 10)
+  assert task["attempts"] == 1
+
+
+def test_expired_lease_stops_at_max_attempts(tmp_path):
+  backend = _open(tmp_path)
+  backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})])
+
+  # 워커가 fail() 없이 죽어 임대가 계속 만료되는 경우
+  for attempt in range(1, 4):
+    task, = backend.lease(f"w{attempt}", 10, lease_seconds=-1, max_attempts=3)
+    assert task["attempts"] == attempt
+
+  assert backend.lease("w4", 10, max_attempts=3) == []
+  assert backend.stats()["counts"] == {"failed": 1}
+
+
+def _stub_notion(monkeypatch, exists):
+  """ Notion API 대신 호출 순서를 기록하는 stub 을 설치합니다. """
+  calls = []
+  monkeypatch.setattr(work_queue.notion_api, "make_config", lambda key, database_id, rate=None: {"database_id": database_id})
+  monkeypatch.setattr(work_queue.notion_api, "check_item_exists_in_notion", lambda name, value, config: calls.append("check") or exists)
+  monkeypatch.setattr(work_queue.notion_api, "add_to_notion_database", lambda item, config: calls.append("add") or True)
+  return calls
+
+
+def test_readded_done_add_checks_before_creating(tmp_path, monkeypatch):
+  backend = _open(tmp_path)
+  calls = _stub_notion(monkeypatch, exists=True)
+  item = {"url": URL}
+
+  work_queue.enqueue_diff(backend, [item], [], DATABASE_ID)
+  work_queue.run_worker(backend, "key")
+  assert calls == ["add"]
+
+  # 이전 add 가 반영되기 전의 스냅샷으로 만든 diff 를 다시 넣어도 페이지를 또 만들지 않음
+  assert work_queue.enqueue_diff(backend, [item], [], DATABASE_ID) == 1
+  work_queue.run_worker(backend, "key")
+  assert calls == ["add", "check"]
+  assert backend.stats()["counts"] == {"done": 1}
+
+
+def test_failed_existence_check_fails_task(tmp_path, monkeypatch):
+  backend = _open(tmp_path)
+  calls = _stub_notion(monkeypatch, exists=None)
+  backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})])
+  _run(backend)
+
+  backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})])
+  work_queue.run_worker(backend, "key")
+  assert calls == ["check"]
+  assert backend.stats()["counts"] == {"pending": 1}
+
+
+def test_extend_fails_after_another_worker_takes_task(tmp_path):
+  backend = _open(tmp_path)
+  backend.enqueue([("add", DATABASE_ID, URL, {"url": URL})])
+  task, = backend.lease("w1", 10, lease_seconds=-1)
+  assert backend.extend(task["id"], "w1")
+
+  backend.extend(task["id"], "w1", lease_seconds=-1)
+  backend.lease("w2", 10)
+  assert not backend.extend(task["id"], "w1")
+  assert not backend.complete(task["id"], "w1")
+
+
+def test_worker_stops_batch_after_losing_lease(tmp_path, monkeypatch):
+  backend = _open(tmp_path)
+  backend.enqueue([("add", DATABASE_ID, f"{URL}/{index}", {"url": f"{URL}/{index}"}) for index in range(3)])
+  processed = []
+
+  def process(task, config):
+    # 첫 작업을 처리하는 동안 임대가 만료돼 다른 워커가 배치 전체를 가져감
+    processed.append(task["url"])
+    backend.lease("w2", 10)
+    return True
+
+  monkeypatch.setattr(work_queue.notion_api, "make_config", lambda key, database_id, rate=None: {})
+  monkeypatch.setattr(work_queue, "_process_task", process)
+  work_queue.run_worker(backend, "key", worker_id="w1", batch_size=3, lease_seconds=-1)
+
+  assert processed == [f"{URL}/0"]
+  assert backend.stats()["counts"] == {"leased": 3}
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import socket
+import logging
+import sqlite3
+
+import notion_api
+from log_config import ProgressLogger
+
+logger = logging.getLogger("work_queue")
+
+# ✅ Notion 쓰기 작업(add/archive)을 위한 내구성 있는 작업 큐
+#
+# global_diff_update 결과를 큐에 넣고(enqueue_diff), 여러 워커 프로세스/머신이
+# 각자의 통합 토큰으로 작업을 임대(lease)해 처리합니다(run_worker).
+#   - 같은 (database_id, op, url) 작업은 대기/임대 중인 동안 한 번만 들어감 (URL 기준 멱등성)
+#     이미 done/failed 인 작업을 다시 넣으면 pending 으로 되돌려 다시 처리함
+#     (이전에 페이지를 만들었을 수 있으므로 되살린 add 는 항상 존재 여부를 먼저 확인)
+#   - 임대 시간이 지나도록 완료되지 않은 작업은 다른 워커가 다시 가져감
+#     (워커는 작업을 하나 처리하기 직전마다 임대를 갱신하므로 lease_seconds 는 한 건 처리 시간 기준)
+#   - 실패한 작업은 지수 백오프로 재시도하고, max_attempts 를 넘으면 failed 로 남김
+#     (워커가 죽어 임대가 만료된 경우도 시도 횟수에 포함)
+#
+# 백엔드는 QueueBackend 인터페이스를 따르며 BACKENDS 에 등록해 교체할 수 있습니다.
+# 기본 SQLite 백엔드는 같은 머신(또는 로컬 디스크)의 여러 프로세스에서 사용하세요.
+# 네트워크 파일 시스템 위의 SQLite 는 잠금이 보장되지 않습니다.
+
+DEFAULT_QUEUE = "sqlite:work_queue.db"
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 5  # 초, 재시도마다 두 배
+
+
+class QueueBackend:
+  """
+  작업 큐 백엔드 인터페이스.
+  작업(task)은 {"id", "op", "database_id", "url", "payload", "attempts"} 형태의 dict 입니다.
+  """
+
+  def enqueue(self, tasks):
+    """
+    (op, database_id, url, payload) 목록을 추가하고, 새로 추가(또는 done/failed 에서 재등록)된 개수를 반환합니다.
+    같은 작업이 대기/임대 중이면 무시합니다.
+    """
+    raise NotImplementedError
+
+  def lease(self, worker_id, limit, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """
+    처리 가능한 작업을 최대 limit 개 임대해 반환합니다.
+    임대가 만료된 작업 중 시도 횟수를 다 쓴 작업은 failed 로 바꿉니다.
+    """
+    raise NotImplementedError
+
+  def extend(self, task_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """ 아직 임대 중인 작업의 임대를 지금부터 lease_seconds 로 갱신합니다. 임대를 잃었으면 False. """
+    raise NotImplementedError
+
+  def complete(self, task_id, worker_id):
+    """ 임대한 작업을 완료 처리합니다. """
+    raise NotImplementedError
+
+  def fail(self, task_id, worker_id, error, max_attempts=MAX_ATTEMPTS):
+    """ 임대한 작업을 실패 처리합니다. (재시도 또는 failed) """
+    raise NotImplementedError
+
+  def stats(self, window=60):
+    """ 상태별 작업 수와 워커별 처리량을 반환합니다. """
+    raise NotImplementedError
+
+  def close(self):
+    pass
+
+
+class SQLiteBackend(QueueBackend):
+  """
+  SQLite(WAL) 기반 작업 큐. 프로세스마다 별도 인스턴스(연결)를 사용합니다.
+  """
+
+  SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+      id INTEGER PRIMARY KEY,
+      op TEXT NOT NULL,
+      database_id TEXT NOT NULL,
+      url TEXT NOT NULL,
+      payload TEXT NOT NULL,
+      status TEXT NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      available_at REAL NOT NULL,
+      lease_owner TEXT,
+      lease_until REAL,
+      last_error TEXT,
+      created_at REAL NOT NULL,
+      completed_at REAL,
+      recheck INTEGER NOT NULL DEFAULT 0,
+      UNIQUE (database_id, op, url)
+    );
+    CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, available_at);
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    self._conn.row_factory = sqlite3.Row
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("PRAGMA synchronous=NORMAL")
+    self._conn.executescript(self.SCHEMA)
+    columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+    if "recheck" not in columns:
+      # recheck 컬럼이 없던 이전 큐 파일
+      self._conn.execute("ALTER TABLE tasks ADD COLUMN recheck INTEGER NOT NULL DEFAULT 0")
+
+  def enqueue(self, tasks):
+    now = time.time()
+    conn = self._conn
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      before = conn.total_changes
+      conn.executemany(
+        "INSERT INTO tasks (op, database_id, url, payload, available_at, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (database_id, op, url) DO UPDATE SET"
+        "  payload = excluded.payload, status = 'pending', attempts = 0,"
+        "  available_at = excluded.available_at, lease_owner = NULL, lease_until = NULL,"
+        "  last_error = NULL, created_at = excluded.created_at, completed_at = NULL, recheck = 1"
+        " WHERE tasks.status IN ('done', 'failed')",
+        (
+          (op, database_id, url, json.dumps(payload, ensure_ascii=False), now, now)
+          for op, database_id, url, payload in tasks
+        ),
+      )
+      inserted = conn.total_changes - before
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+    return inserted
+
+  def lease(self, worker_id, limit, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    now = time.time()
+    conn = self._conn
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      # 임대 중 워커가 죽어 fail() 없이 만료된 작업도 시도 횟수를 다 쓰면 더 이상 재시도하지 않음
+      conn.execute(
+        "UPDATE tasks SET status = 'failed', lease_until = NULL,"
+        " last_error = COALESCE(last_error, 'lease expired')"
+        " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+        (now, max_attempts),
+      )
+      # 다시 넣은 작업은 created_at 이 갱신되므로 id 가 아닌 넣은 순서대로 처리 (add → archive → add)
+      rows = conn.execute(
+        "SELECT id FROM tasks"
+        " WHERE (status = 'pending' AND available_at <= ?)"
+        "    OR (status = 'leased' AND lease_until < ? AND attempts < ?)"
+        " ORDER BY created_at, id LIMIT ?",
+        (now, now, max_attempts, limit),
+      ).fetchall()
+      ids = [row["id"] for row in rows]
+      tasks = []
+      if ids:
+        marks = ",".join("?" * len(ids))
+        conn.execute(
+          f"UPDATE tasks SET status = 'leased', lease_owner = ?, lease_until = ?,"
+          f" attempts = attempts + 1 WHERE id IN ({marks})",
+          (worker_id, now + lease_seconds, *ids),
+        )
+        tasks = [
+          {
+            "id": row["id"],
+            "op": row["op"],
+            "database_id": row["database_id"],
+            "url": row["url"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"],
+            "recheck": bool(row["recheck"]),
+          }
+          for row in conn.execute(
+            f"SELECT * FROM tasks WHERE id IN ({marks}) ORDER BY created_at, id", ids
+          )
+        ]
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+    return tasks
+
+  def extend(self, task_id, worker_id, lease_seconds=LEASE_SECONDS):
+    cursor = self._conn.execute(
+      "UPDATE tasks SET lease_until = ?"
+      " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+      (time.time() + lease_seconds, task_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+  def complete(self, task_id, worker_id):
+    cursor = self._conn.execute(
+      "UPDATE tasks SET status = 'done', completed_at = ?, lease_until = NULL, last_error = NULL"
+      " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+      (time.time(), task_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+  def fail(self, task_id, worker_id, error, max_attempts=MAX_ATTEMPTS):
+    now = time.time()
+    cursor = self._conn.execute(
+      "UPDATE tasks SET"
+      "  status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+      "  available_at = ? + ? * (1 << (attempts - 1)),"
+      "  lease_until = NULL, last_error = ?"
+      " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+      (max_attempts, now, RETRY_BACKOFF, str(error), task_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+  def stats(self, window=60):
+    now = time.time()
+    counts = {
+      row["status"]: row["count"]
+      for row in self._conn.execute("SELECT status, COUNT(*) AS count FROM tasks GROUP BY status")
+    }
+    workers = {
+      row["lease_owner"]: {
+        "done": row["done"],
+        "recent": row["recent"],
+        "rate": row["recent"] / window,
+        "last_completed_at": row["last_completed_at"],
+      }
+      for row in self._conn.execute(
+        "SELECT lease_owner, COUNT(*) AS done,"
+        " SUM(completed_at >= ?) AS recent, MAX(completed_at) AS last_completed_at"
+        " FROM tasks WHERE status = 'done' GROUP BY lease_owner",
+        (now - window,),
+      )
+    }
+    return {"counts": counts, "workers": workers, "window": window}
+
+  def close(self):
+    self._conn.close()
+
+
+# 백엔드 이름 → 클래스. "이름:위치" 형태의 큐 주소로 선택합니다. (예: "sqlite:work_queue.db")
+BACKENDS = {
+  "sqlite": SQLiteBackend,
+}
+
+
+def open_queue(spec=DEFAULT_QUEUE):
+  """
+  큐 주소("백엔드:위치")로 백엔드 인스턴스를 엽니다.
+  """
+  name, _, location = spec.partition(":")
+  if name not in BACKENDS:
+    raise ValueError(f"알 수 없는 큐 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+  return BACKENDS[name](location)
+
+
+def enqueue_diff(backend, added, removed, database_id):
+  """
+  global_diff_update 의 added/removed 를 add/archive 작업으로 큐에 넣습니다.
+
+  Returns:
+      int: 새로 추가된 작업 수 (대기/임대 중인 같은 작업은 무시, done/failed 작업은 다시 pending)
+  """
+  tasks = [("add", database_id, item["url"], item) for item in added]
+  tasks += [("archive", database_id, item["url"], item) for item in removed]
+  inserted = backend.enqueue(tasks)
+  logger.info(
+    "📥 Enqueued Notion writes",
+    extra={"fields": {"added": len(added), "removed": len(removed), "inserted": inserted}},
+  )
+  return inserted
+
+
+def _process_task(task, config):
+  item = task["payload"]
+  if task["op"] == "add":
+    # 이전 시도가 페이지를 만든 뒤 완료 처리 전에 중단됐거나, 이미 끝난 add 를 다시 넣은 경우 먼저 확인
+    if task["attempts"] > 1 or task["recheck"]:
+      exists = notion_api.check_item_exists_in_notion("url", task["url"], config)
+      if exists is None:
+        # 확인하지 못했으면 페이지를 만들지 않고 실패로 처리해 나중에 재시도
+        return False
+      if exists:
+        return True
+    return notion_api.add_to_notion_database(item, config)
+  if task["op"] == "archive":
+    return notion_api.delete_from_notion_database(item["id"], config)
+  raise ValueError(f"알 수 없는 작업: {task['op']}")
+
+
+def run_worker(backend, notion_key, worker_id=None, batch_size=10,
+               lease_seconds=LEASE_SECONDS, poll_interval=5, exit_when_empty=True, rate_limit=None):
+  """
+  큐에서 작업을 임대해 Notion 에 반영합니다.
+
+  Args:
+      backend: QueueBackend 인스턴스.
+      notion_key: 이 워커가 사용할 통합 토큰.
+      worker_id: 워커 식별자 (기본값: "호스트명:pid").
+      batch_size: 한 번에 임대할 작업 수.
+      lease_seconds: 임대 유지 시간(초). 작업마다 처리 직전에 갱신하므로 한 건을 처리하기에 충분해야 함.
+      poll_interval: 큐가 비었을 때 대기 시간(초).
+      exit_when_empty: 처리할 작업이 없으면 종료.
+      rate_limit: 이 워커의 초당 요청 수 (기본값: NOTION_RATE_LIMIT).
+  """
+  worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+  configs = {}
+  progress = ProgressLogger(logger, f"🛠️ Worker {worker_id}")
+
+  while True:
+    tasks = backend.lease(worker_id, batch_size, lease_seconds)
+    if not tasks:
+      if exit_when_empty:
+        break
+      time.sleep(poll_interval)
+      continue
+
+    for task in tasks:
+      # 앞 작업을 처리하는 동안 임대가 만료돼 다른 워커가 가져갔으면 건너뜀
+      if not backend.extend(task["id"], worker_id, lease_seconds):
+        logger.warning(f"⚠️ Lost lease on task {task['id']}, skipping")
+        continue
+
+      database_id = task["database_id"]
+      if database_id not in configs:
+        configs[database_id] = notion_api.make_config(notion_key, database_id, rate_limit)
+      error = "Notion API request failed"
+      try:
+        ok = _process_task(task, configs[database_id])
+      except Exception as e:
+        ok = False
+        error = repr(e)
+        logger.exception(f"❌ Task {task['id']} raised")
+
+      if ok:
+        settled = backend.complete(task["id"], worker_id)
+      else:
+        settled = backend.fail(task["id"], worker_id, error)
+      if not settled:
+        # 처리 중에 임대를 잃음 — 결과는 새로 임대한 워커가 반영하므로 성공으로 세지 않고 배치를 중단
+        logger.warning(f"⚠️ Lost lease on task {task['id']} while processing, dropping the rest of the batch")
+        progress.record(False, task["url"])
+        break
+      progress.record(ok, task["url"])
+
+  progress.finish()
+
+
+def _worker_process(spec, notion_key, rate_limit, log_file, kwargs):
+  from log_config import setup_logging
+
+  setup_logging(log_file)
+  backend = open_queue(spec)
+  try:
+    run_worker(backend, notion_key, rate_limit=rate_limit, **kwargs)
+  finally:
+    backend.close()
+
+
+def start_workers(spec, notion_keys, processes, log_file, **kwargs):
+  """
+  워커 프로세스 여러 개를 띄워 큐를 처리하고, 모두 끝날 때까지 기다립니다.
+  각 프로세스는 자신의 큐 연결과 로깅 리스너를 새로 만듭니다. (spawn 방식)
+
+  통합 토큰은 프로세스에 차례로 나눠 주며, 한 토큰을 여러 프로세스가 함께 쓰면
+  토큰당 요청 수가 NOTION_RATE_LIMIT 를 넘지 않도록 프로세스마다 그 몫만큼만 요청합니다.
+
+  Args:
+      spec: 큐 주소.
+      notion_keys (list): 워커들이 사용할 통합 토큰 목록.
+      processes (int): 워커 프로세스 수. 토큰 수보다 적을 수 없음.
+      log_file (str): 로그 파일 이름.
+  """
+  import multiprocessing
+
+  if processes < len(notion_keys):
+    raise ValueError(f"워커 프로세스 수({processes})가 통합 토큰 수({len(notion_keys)})보다 적습니다.")
+
+  assigned = [notion_keys[index % len(notion_keys)] for index in range(processes)]
+  context = multiprocessing.get_context("spawn")
+  workers = [
+    context.Process(
+      target=_worker_process,
+      args=(spec, notion_key, notion_api.NOTION_RATE_LIMIT / assigned.count(notion_key), log_file, kwargs),
+    )
+    for notion_key in assigned
+  ]
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  return all(worker.exitcode == 0 for worker in workers)
+
+
+def format_stats(stats):
+  """
+  stats() 결과를 사람이 읽기 쉬운 여러 줄 문자열로 만듭니다.
+  """
+  counts = stats["counts"]
+  total = sum(counts.values())
+  done = counts.get("done", 0)
+  lines = [
+    f"📊 {done}/{total} done"
+    + "".join(f", {status}: {counts.get(status, 0)}" for status in ("pending", "leased", "failed")),
+  ]
+  total_rate = 0
+  for worker_id, worker in sorted(stats["workers"].items(), key=lambda entry: str(entry[0])):
+    total_rate += worker["rate"]
+    lines.append(f"  - {worker_id}: {worker['done']} done, {worker['rate']:.2f}/s (last {stats['window']}s)")
+  lines.append(f"  ⏱️ throughput: {total_rate:.2f}/s")
+  return "\n".join(lines)